@@ -2,7 +2,7 @@ import os
 from contextlib import asynccontextmanager
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Header, APIRouter
+from fastapi import FastAPI, HTTPException, Header, APIRouter, Query
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.models import (
@@ -11,13 +11,16 @@ from api.models import (
     JobInputRequest,
 )
 
-from api.routes import settings
+from api.routes import settings, library
 
 from core.states import PipelineState
 from core.job import Job, IdentityHint, JobOptions
 from infra.sqlite_job_store import SQLiteJobStore
 from infra.job_store import JobStore
-from worker.runtime import WorkerRuntime
+from worker.runtime import WorkerRuntime, collect_worker_stats
+from utils.ytmusic_client import get_ytmusic_pool, get_search_cache
+from utils.metadata import get_itunes_client
+from utils.tagging import get_album_art_cache
 from dataclasses import asdict
 from fastapi.responses import JSONResponse
 import httpx
@@ -28,20 +31,32 @@ from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 
-def build_status(job: Job) -> JobStatusResponse:
-    status = "running"
-
-    if job.current_state.name.startswith("USER_"):
-        status = "waiting"
-
-    if job.current_state == PipelineState.FINALIZED:
-        status = "success"
+# Public status vocabulary (see build_status) -> PipelineState names
+STATUS_STATES = {
+    "success": [PipelineState.FINALIZED.name],
+    "error": [PipelineState.FAILED.name],
+    "cancelled": [PipelineState.CANCELLED.name],
+    "waiting": [s.name for s in PipelineState if s.name.startswith("USER_")],
+    "running": [
+        s.name for s in PipelineState
+        if not s.name.startswith("USER_")
+        and s not in (
+            PipelineState.FINALIZED,
+            PipelineState.FAILED,
+            PipelineState.CANCELLED,
+        )
+    ],
+}
 
-    if job.current_state == PipelineState.FAILED:
-        status = "error"
+# PipelineState name -> public status
+STATE_STATUS = {
+    state: status
+    for status, states in STATUS_STATES.items()
+    for state in states
+}
 
-    if job.current_state == PipelineState.CANCELLED:
-        status = "cancelled"
+def build_status(job: Job) -> JobStatusResponse:
+    status = STATE_STATUS[job.current_state.name]
 
     can_resume = (
         job.current_state == PipelineState.CANCELLED
@@ -100,7 +115,9 @@ def create_app(*, host: str, port: int) -> FastAPI:
     
     db_path = str(Config.DB_PATH)
     store: JobStore = SQLiteJobStore(db_path)
-    worker = WorkerRuntime(store)
+
+    # None when a standalone worker (worker/main.py) runs the pipeline
+    worker: Optional[WorkerRuntime] = WorkerRuntime(store) if Config.EMBEDDED_WORKER else None
 
     # ----------------------------------
     # Lifespan (worker ownership)
@@ -108,14 +125,19 @@ def create_app(*, host: str, port: int) -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        worker.start()
+        if worker:
+            worker.start()
         yield
-        worker.stop()
+        if worker:
+            worker.stop()
 
     app = FastAPI(
         title="TrueTrack API",
         lifespan=lifespan,
     )
+
+    # Settings routes resize the in-process worker pool through this
+    app.state.worker_runtime = worker
     
     # ----------------------------------
     # Serve Next.js static assets
@@ -140,6 +162,8 @@ def create_app(*, host: str, port: int) -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Pagination cursor of GET /api/jobs (see list_jobs)
+        expose_headers=["X-Next-Cursor"],
     )
     
     @api.post("/jobs", response_model=JobStatusResponse)
@@ -238,35 +262,46 @@ def create_app(*, host: str, port: int) -> FastAPI:
         return build_status(job)
 
     @api.get("/jobs")
-    def list_jobs():
-        jobs = store.list_jobs(limit=50)
-        summaries = []
+    def list_jobs(
+        response: Response,
+        limit: int = Query(default=50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+    ):
+        states = None
+        if status:
+            if status not in STATUS_STATES:
+                raise HTTPException(status_code = 400, detail = "Unknown status filter")
+            states = STATUS_STATES[status]
+
+        try:
+            rows, next_cursor = store.list_job_summaries(
+                limit=limit,
+                cursor=cursor,
+                states=states,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code = 400, detail = str(e))
 
-        for job in jobs:
-            title = None
-            artist = None
+        # Body stays a plain list; the next page is advertised in a header
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
 
-            if job.final_metadata:
-                title = job.final_metadata.get("trackName")
-                artist = job.final_metadata.get("artistName")
-            elif job.result:
-                title = job.result.title
-                artist = job.result.artist
+        summaries = []
+
+        for row in rows:
+            state = row["current_state"]
 
             summaries.append({
-                "job_id": job.job_id,
-                "status": (
-                    "success"
-                    if job.current_state == PipelineState.FINALIZED
-                    else job.current_state.name.lower()
-                ),
-                "state": job.current_state.name,
-                "title": title,
-                "artist": artist,
-                "created_at": job.created_at.isoformat(),
+                "job_id": row["job_id"],
+                "status": STATE_STATUS.get(state, "running"),
+                "state": state,
+                "title": row["title"],
+                "artist": row["artist"],
+                "created_at": row["created_at"],
                 "can_resume": (
-                    job.current_state == PipelineState.CANCELLED
-                    and job.resume_from is not None
+                    state == PipelineState.CANCELLED.name
+                    and row["resume_from"] is not None
                 ),
             })
 
@@ -295,6 +330,20 @@ def create_app(*, host: str, port: int) -> FastAPI:
         store.update(job)
         return build_status(job)
         
+    @api.get("/workers")
+    def worker_stats():
+        # Published by every worker process, embedded or standalone
+        return collect_worker_stats(store)
+
+    @api.get("/metrics")
+    def metrics():
+        return {
+            "ytmusic": get_ytmusic_pool().stats(),
+            "search_cache": get_search_cache().stats(),
+            "itunes": get_itunes_client().stats(),
+            "album_art": get_album_art_cache().stats(),
+        }
+
     @api.get("/__config", include_in_schema=False)
     def runtime_config():
         return JSONResponse({
@@ -306,6 +355,7 @@ def create_app(*, host: str, port: int) -> FastAPI:
 
     app.include_router(api)
     app.include_router(settings.router)
+    app.include_router(library.router)
 
     # ----------------------------------
     # Frontend Proxy (Next.js Standalone)
@@ -18,6 +18,14 @@ class JobOptions(BaseModel):
         default=False,
         description="Skip metadata matching and archive the track"
     )
+    output_format: Optional[Literal["mp3_320", "mp3_matched", "native"]] = Field(
+        default=None,
+        description="Output-format policy; defaults to the app setting"
+    )
+    no_cache: bool = Field(
+        default=False,
+        description="Bypass cached search and metadata lookups"
+    )
 
 class CreateJobRequest(BaseModel):
     query: str = Field(
@@ -79,6 +87,31 @@ class UpdateMusicLibraryRequest(BaseModel):
         description="Absolute path to the new music library root"
     )
 
+class UpdateWorkerConcurrencyRequest(BaseModel):
+    concurrency: int = Field(
+        ...,
+        ge=1,
+        description="Number of jobs downloading in parallel (download pool size)"
+    )
+
+class UpdateOutputFormatRequest(BaseModel):
+    output_format: Literal["mp3_320", "mp3_matched", "native"] = Field(
+        ...,
+        description="mp3_320 (re-encode at 320 kbps), mp3_matched (re-encode at source bitrate) or native (keep source codec)"
+    )
+
+class UpdateLibraryLayoutRequest(BaseModel):
+    layout: str = Field(
+        ...,
+        description="Library path template, e.g. {albumartist}/{album}/{track:02} {title}"
+    )
+
 class SettingsResponse(BaseModel):
     music_library_path: str
     source: Literal["db", "env", "default"]
+    worker_concurrency: int
+    worker_concurrency_source: Literal["db", "env", "default"]
+    output_format: str
+    output_format_source: Literal["db", "env", "default"]
+    library_layout: str
+    library_layout_source: Literal["db", "env", "default"]
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Query
+from core.app_config import AppConfig
+from infra.library_index import get_library_index
+
+router = APIRouter(prefix="/api/library", tags=["library"])
+
+@router.get("")
+def search_library(
+    q: str = Query("", description="Match against title or artist"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    return get_library_index().search(q, limit=limit)
+
+@router.get("/stats")
+def library_stats():
+    return get_library_index().stats()
+
+@router.post("/rescan")
+def rescan_library():
+    # Incremental: only new or modified files are re-read
+    return get_library_index().rescan(AppConfig.get_music_library_root())
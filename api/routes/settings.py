@@ -1,21 +1,34 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from core.app_config import AppConfig
-from api.models import SettingsResponse, UpdateMusicLibraryRequest
+from api.models import (
+    SettingsResponse, UpdateMusicLibraryRequest, UpdateWorkerConcurrencyRequest,
+    UpdateOutputFormatRequest, UpdateLibraryLayoutRequest,
+)
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
-@router.get("", response_model=SettingsResponse)
-def get_settings():
-    path = AppConfig.get_music_library_root()
-    source = AppConfig.get_config_source("music_library_root")
-    
+def _source(key: str) -> str:
+    source = AppConfig.get_config_source(key)
+
     # Map unknown to default to satisfy strict literal
     if source not in ("db", "env", "default"):
         source = "default"
-        
+
+    return source
+
+@router.get("", response_model=SettingsResponse)
+def get_settings():
+    path = AppConfig.get_music_library_root()
+
     return SettingsResponse(
         music_library_path=str(path),
-        source=source # type: ignore
+        source=_source("music_library_root"), # type: ignore
+        worker_concurrency=AppConfig.get_worker_concurrency(),
+        worker_concurrency_source=_source("worker_concurrency"), # type: ignore
+        output_format=AppConfig.get_output_format(),
+        output_format_source=_source("output_format"), # type: ignore
+        library_layout=AppConfig.get_library_layout(),
+        library_layout_source=_source("library_layout"), # type: ignore
     )
 
 @router.put("/music-library-path", response_model=SettingsResponse)
@@ -24,5 +37,38 @@ def update_music_library_path(payload: UpdateMusicLibraryRequest):
         AppConfig.set_music_library_root(payload.path)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
+
+    return get_settings()
+
+@router.put("/worker-concurrency", response_model=SettingsResponse)
+def update_worker_concurrency(payload: UpdateWorkerConcurrencyRequest, request: Request):
+    try:
+        AppConfig.set_worker_concurrency(payload.concurrency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Apply to the in-process pool right away;
+    # standalone worker processes pick it up on restart.
+    runtime = getattr(request.app.state, "worker_runtime", None)
+    if runtime:
+        runtime.resize(AppConfig.get_worker_concurrency())
+
+    return get_settings()
+
+@router.put("/output-format", response_model=SettingsResponse)
+def update_output_format(payload: UpdateOutputFormatRequest):
+    try:
+        AppConfig.set_output_format(payload.output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return get_settings()
+
+@router.put("/library-layout", response_model=SettingsResponse)
+def update_library_layout(payload: UpdateLibraryLayoutRequest):
+    try:
+        AppConfig.set_library_layout(payload.layout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return get_settings()
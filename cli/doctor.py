@@ -86,7 +86,26 @@ def check_config() -> str:
         except Exception as e:
             print_error(f"Failed to resolve Music Library: {e}")
             status = "BROKEN"
-            
+
+        # 3. Scratch space: finishing a track should be a rename, not a copy
+        try:
+            from utils.paths import get_scratch_root
+            from utils.storage import same_device
+
+            scratch_root = get_scratch_root()
+            print_info("Scratch Directory", str(scratch_root))
+            if same_device(scratch_root, lib_root):
+                print_success("Scratch directory is on the music library's filesystem")
+            else:
+                print_warning(
+                    "Scratch directory and music library are on different devices: "
+                    "every track is copied instead of renamed (unset TRUETRACK_SCRATCH_DIR)"
+                )
+                if status == "GOOD":
+                    status = "DEGRADED"
+        except Exception as e:
+            print_warning(f"Could not check scratch directory: {e}")
+
     except Exception as e:
         print_error(f"Could list load AppConfig: {e}")
         status = "BROKEN"
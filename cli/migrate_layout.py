@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+import mutagen
+
+from core.app_config import AppConfig
+from infra.library_index import AUDIO_EXTENSIONS, EXCLUDED_DIRS, first_tag, get_library_index
+from utils.storage import layout_fields, move_to_unique_path, render_layout, unique_path, validate_layout
+
+# Reuse the doctor's console helpers
+from cli.doctor import print_header, print_success, print_warning, print_error, print_info
+
+
+def read_fields(path: Path) -> dict:
+    """
+    Layout fields from the file's tags, falling back to the
+    flat "{title} - {artist}" file name.
+    """
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception:
+        audio = None
+    tags = audio.tags if audio is not None else None
+
+    title = first_tag(tags, "title")
+    artist = first_tag(tags, "artist")
+
+    if not title or not artist:
+        if " - " in path.stem:
+            name_title, name_artist = path.stem.rsplit(" - ", 1)
+        else:
+            name_title, name_artist = path.stem, ""
+        title = title or name_title
+        artist = artist or name_artist
+
+    return layout_fields(
+        title,
+        artist,
+        album=first_tag(tags, "album"),
+        albumartist=first_tag(tags, "albumartist"),
+        track=first_tag(tags, "tracknumber"),
+        disc=first_tag(tags, "discnumber"),
+        year=first_tag(tags, "date"),
+    )
+
+
+def _library_files(root: Path):
+    """
+    Audio files anywhere under `root`, skipping the unverified archive
+    and hidden directories (scratch space), like the library index.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in EXCLUDED_DIRS and not d.startswith(".")
+        )
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            if path.suffix.lower() in AUDIO_EXTENSIONS:
+                yield path
+
+
+def _already_placed(path: Path, target: Path) -> bool:
+    # "name (2).ext" is where a collision on "name.ext" was stored
+    if path == target:
+        return True
+    if path.parent != target.parent or path.suffix != target.suffix:
+        return False
+    return re.fullmatch(rf"{re.escape(target.stem)} \(\d+\)", path.stem) is not None
+
+
+def plan_moves(root: Path, layout: str) -> List[Tuple[Path, Path]]:
+    """
+    (source, target) pairs for the audio files under `root` that are
+    not where `layout` puts them.
+    """
+    moves = []
+    for path in _library_files(root):
+        target = root / render_layout(layout, read_fields(path), path.suffix)
+        if not _already_placed(path, target):
+            moves.append((path, target))
+
+    return moves
+
+
+def _remove_empty_dirs(path: Path, root: Path) -> None:
+    # Directories emptied by the migration, up to (not including) root
+    while path != root and root in path.parents:
+        try:
+            path.rmdir()
+        except OSError:
+            return
+        path = path.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Reorganize a TrueTrack library into the configured layout. "
+            "Audio files at any depth under the library root are moved into place; "
+            "_Unidentified/ and hidden directories are left alone."
+        )
+    )
+    parser.add_argument("--layout", help="Layout template (default: the configured library layout)")
+    parser.add_argument("--root", help="Library root (default: the configured music library)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned moves")
+    args = parser.parse_args()
+
+    layout = args.layout or AppConfig.get_library_layout()
+    try:
+        validate_layout(layout)
+    except ValueError as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    root = Path(args.root).expanduser() if args.root else AppConfig.get_music_library_root()
+
+    print_header("Library Layout Migration")
+    print_info("Library", str(root))
+    print_info("Layout", layout)
+
+    moves = plan_moves(root, layout)
+    if not moves:
+        print_success("Nothing to move")
+        return
+
+    index = get_library_index()
+    moved = 0
+
+    for source, target in moves:
+        if args.dry_run:
+            print(f"  {source.relative_to(root)}  ->  {unique_path(target).relative_to(root)}")
+            continue
+
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Same volume: a single atomic rename per file, never over a
+            # track stored by a running worker in the meantime
+            target = move_to_unique_path(source, target)
+        except OSError as e:
+            print_warning(f"{source.relative_to(root)}: {e}")
+            continue
+
+        index.move(source, target)
+        _remove_empty_dirs(source.parent, root)
+        moved += 1
+
+    if args.dry_run:
+        print_success(f"{len(moves)} file(s) would be moved")
+    else:
+        print_success(f"Moved {moved} of {len(moves)} file(s)")
+
+
+if __name__ == "__main__":
+    main()
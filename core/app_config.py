@@ -5,6 +5,8 @@ from pathlib import Path
 from typing import Optional, Literal
 
 from core.config import Config
+from utils.storage import validate_layout
+from infra.sqlite_connection import get_database
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +32,7 @@ class AppConfig:
             pass # handled downstream or already exists
 
         try:
-            with sqlite3.connect(db_path) as conn:
+            with get_database(db_path).connect() as conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS app_settings (
                         key TEXT PRIMARY KEY,
@@ -48,7 +50,7 @@ class AppConfig:
     def _get_db_value(cls, key: str) -> Optional[str]:
         cls._init_settings_table()
         try:
-            with sqlite3.connect(Config.DB_PATH) as conn:
+            with get_database(Config.DB_PATH).connect() as conn:
                 row = conn.execute(
                     "SELECT value FROM app_settings WHERE key = ?",
                     (key,)
@@ -61,7 +63,7 @@ class AppConfig:
     @classmethod
     def _set_db_value(cls, key: str, value: str) -> None:
         cls._init_settings_table()
-        with sqlite3.connect(Config.DB_PATH) as conn:
+        with get_database(Config.DB_PATH).connect() as conn:
             conn.execute(
                 """
                 INSERT INTO app_settings (key, value)
@@ -122,6 +124,99 @@ class AppConfig:
 
         cls._set_db_value("music_library_root", str(p))
 
+    @classmethod
+    def get_worker_concurrency(cls) -> int:
+        """
+        Resolve the number of concurrent pipeline workers.
+        Order:
+        1. DB (user selected)
+        2. Env (TRUETRACK_WORKER_CONCURRENCY)
+        3. Default (CPU count, capped at 4)
+        """
+        for raw in (cls._get_db_value("worker_concurrency"), Config.ENV_WORKER_CONCURRENCY):
+            if not raw:
+                continue
+            try:
+                value = int(raw)
+            except ValueError:
+                logger.warning(f"Ignoring invalid worker concurrency: {raw!r}")
+                continue
+            return max(1, min(value, Config.MAX_WORKER_CONCURRENCY))
+
+        return min(4, os.cpu_count() or 1)
+
+    @classmethod
+    def set_worker_concurrency(cls, value: int) -> None:
+        """
+        Set and persist the number of concurrent pipeline workers.
+        """
+        if value < 1 or value > Config.MAX_WORKER_CONCURRENCY:
+            raise ValueError(
+                f"Worker concurrency must be between 1 and {Config.MAX_WORKER_CONCURRENCY}"
+            )
+
+        cls._set_db_value("worker_concurrency", str(value))
+
+    @classmethod
+    def get_output_format(cls) -> str:
+        """
+        Resolve the default output-format policy.
+        Order:
+        1. DB (user selected)
+        2. Env (TRUETRACK_OUTPUT_FORMAT)
+        3. Default (mp3_320)
+        """
+        for raw in (cls._get_db_value("output_format"), Config.ENV_OUTPUT_FORMAT):
+            if not raw:
+                continue
+            if raw in Config.OUTPUT_FORMATS:
+                return raw
+            logger.warning(f"Ignoring invalid output format: {raw!r}")
+
+        return Config.DEFAULT_OUTPUT_FORMAT
+
+    @classmethod
+    def set_output_format(cls, value: str) -> None:
+        """
+        Set and persist the default output-format policy.
+        """
+        if value not in Config.OUTPUT_FORMATS:
+            raise ValueError(
+                f"Output format must be one of: {', '.join(Config.OUTPUT_FORMATS)}"
+            )
+
+        cls._set_db_value("output_format", value)
+
+    @classmethod
+    def get_library_layout(cls) -> str:
+        """
+        Resolve the library layout template.
+        Order:
+        1. DB (user selected)
+        2. Env (TRUETRACK_LIBRARY_LAYOUT)
+        3. Default (flat "{title} - {artist}")
+        """
+        for raw in (cls._get_db_value("library_layout"), Config.ENV_LIBRARY_LAYOUT):
+            if not raw:
+                continue
+            try:
+                validate_layout(raw)
+            except ValueError as e:
+                logger.warning(f"Ignoring invalid library layout {raw!r}: {e}")
+                continue
+            return raw
+
+        return Config.DEFAULT_LIBRARY_LAYOUT
+
+    @classmethod
+    def set_library_layout(cls, template: str) -> None:
+        """
+        Set and persist the library layout template.
+        Applies to newly stored tracks; see cli/migrate_layout.py for existing ones.
+        """
+        validate_layout(template)
+        cls._set_db_value("library_layout", template)
+
     @classmethod
     def get_config_source(cls, key: str) -> Literal["db", "env", "default", "unknown"]:
         """Debug helper to know where a config came from."""
@@ -131,4 +226,22 @@ class AppConfig:
             if Config.ENV_MUSIC_LIBRARY_ROOT:
                 return "env"
             return "default"
+        if key == "worker_concurrency":
+            if cls._get_db_value("worker_concurrency"):
+                return "db"
+            if Config.ENV_WORKER_CONCURRENCY:
+                return "env"
+            return "default"
+        if key == "library_layout":
+            if cls._get_db_value("library_layout"):
+                return "db"
+            if Config.ENV_LIBRARY_LAYOUT:
+                return "env"
+            return "default"
+        if key == "output_format":
+            if cls._get_db_value("output_format"):
+                return "db"
+            if Config.ENV_OUTPUT_FORMAT:
+                return "env"
+            return "default"
         return "unknown"
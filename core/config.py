@@ -5,6 +5,10 @@ class Config:
 
     # Raw environment variable fallback (optional)
     ENV_MUSIC_LIBRARY_ROOT = os.getenv("MUSIC_LIBRARY_ROOT")
+    ENV_WORKER_CONCURRENCY = os.getenv("TRUETRACK_WORKER_CONCURRENCY")
+    ENV_OUTPUT_FORMAT = os.getenv("TRUETRACK_OUTPUT_FORMAT")
+    ENV_LIBRARY_LAYOUT = os.getenv("TRUETRACK_LIBRARY_LAYOUT")
+    ENV_SCRATCH_DIR = os.getenv("TRUETRACK_SCRATCH_DIR")
 
     try:
         DB_PATH = Path(os.environ["TRUETRACK_DB_PATH"])
@@ -15,6 +19,83 @@ class Config:
         )
 
     ITUNES_MAX_RETRIES = 3
+    ITUNES_BACKOFF_SECONDS = 0.5
     ITUNES_TIMEOUT = 10
+
+    # iTunes response cache (see utils/metadata.py)
+    ITUNES_CACHE_TTL_SECONDS = int(os.getenv("TRUETRACK_ITUNES_CACHE_TTL") or 7 * 24 * 3600)
+    ITUNES_NEGATIVE_CACHE_TTL_SECONDS = 3600
+    ITUNES_CACHE_MAX_ENTRIES = int(os.getenv("TRUETRACK_ITUNES_CACHE_MAX_ENTRIES") or 20000)
     ALBUM_ART_TIMEOUT = 10
-    
+
+    # Album art cache (see utils/tagging.py)
+    ART_CACHE_DIR = Path(os.getenv("TRUETRACK_ART_CACHE_DIR") or DB_PATH.parent / "art_cache")
+    ART_CACHE_MAX_BYTES = int(os.getenv("TRUETRACK_ART_CACHE_MAX_MB") or 256) * 1024 * 1024
+    ART_CACHE_TTL_SECONDS = 30 * 24 * 3600
+    ART_CACHE_MAX_ENTRIES = 50000
+    # Recompress / downscale embedded art above this size (0 = off; needs Pillow)
+    ART_MAX_BYTES = int(os.getenv("TRUETRACK_ART_MAX_KB") or 0) * 1024
+    ART_MIN_DIMENSION = 300
+
+    MAX_WORKER_CONCURRENCY = 64
+
+    # Output-format policy (see handle_extracting)
+    # - mp3_320:     always re-encode to 320 kbps MP3 (legacy)
+    # - mp3_matched: re-encode to MP3 at the probed source bitrate
+    # - native:      keep the source codec (m4a/opus), no re-encode
+    OUTPUT_FORMATS = ("mp3_320", "mp3_matched", "native")
+    DEFAULT_OUTPUT_FORMAT = "mp3_320"
+
+    # Library layout template (see utils/storage.render_layout), e.g.
+    # "{albumartist}/{album}/{track:02} {title}". Default: the flat layout.
+    DEFAULT_LIBRARY_LAYOUT = "{title} - {artist}"
+
+    # Run a WorkerRuntime inside the API process (app.py). The launchers
+    # (run.sh / run.ps1 start) turn it off: they run worker/main.py instead,
+    # and two runtimes on one DB would double every pool and the bandwidth
+    EMBEDDED_WORKER = os.getenv("TRUETRACK_EMBEDDED_WORKER", "1").lower() not in ("0", "false", "no")
+
+    # Keep stepping a claimed job until it pauses or finishes instead of
+    # one step per claim (see Worker._process_job)
+    WORKER_RUN_UNTIL_PAUSE = os.getenv("TRUETRACK_WORKER_RUN_UNTIL_PAUSE", "").lower() in ("1", "true", "yes")
+
+    # Set by the worker supervisor in its children (worker/main.py
+    # --processes N): pool sizes and the bandwidth budget are totals,
+    # each process takes 1/N of them
+    WORKER_PROCESS_COUNT = max(1, int(os.getenv("TRUETRACK_WORKER_PROCESS_COUNT") or 1))
+
+    # Per-stage worker pools (see worker/pools.py)
+    POOL_NETWORK_SLOTS = int(os.getenv("TRUETRACK_POOL_NETWORK_SLOTS") or 16)
+    POOL_CPU_SLOTS = int(os.getenv("TRUETRACK_POOL_CPU_SLOTS") or os.cpu_count() or 1)
+    POOL_DISK_SLOTS = int(os.getenv("TRUETRACK_POOL_DISK_SLOTS") or 2)
+
+    # Speculative metadata matching during DOWNLOADING
+    SPECULATIVE_MATCHING = os.getenv("TRUETRACK_SPECULATIVE_MATCHING", "1").lower() not in ("0", "false", "no")
+    SPECULATION_WORKERS = 4
+    # How long a finished download waits for a lookup still in flight
+    SPECULATION_JOIN_SECONDS = 2
+
+    # Threads reading tags during library scans (see infra/library_index.py)
+    LIBRARY_SCAN_WORKERS = int(os.getenv("TRUETRACK_LIBRARY_SCAN_WORKERS") or 8)
+
+    # YouTube Music search cache (see utils/ytmusic_client.py)
+    SEARCH_CACHE_TTL_SECONDS = int(os.getenv("TRUETRACK_SEARCH_CACHE_TTL") or 24 * 3600)
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("TRUETRACK_SEARCH_CACHE_MAX_ENTRIES") or 5000)
+
+    # yt-dlp backend for DOWNLOADING:
+    # - auto:       drive yt_dlp.YoutubeDL in the worker process when the
+    #               module is importable, otherwise spawn the CLI
+    # - subprocess: always spawn the CLI
+    DOWNLOAD_BACKEND = os.getenv("TRUETRACK_DOWNLOAD_BACKEND", "auto").lower()
+
+    # Fused DOWNLOADING+EXTRACTING: pipe yt-dlp straight into ffmpeg
+    # (falls back to download-then-extract on failure)
+    STREAM_TRANSCODE = os.getenv("TRUETRACK_STREAM_TRANSCODE", "").lower() in ("1", "true", "yes")
+
+    # Download bandwidth scheduling (see worker/bandwidth.py)
+    # Global budget shared by all active downloads, KiB/s (0 = unlimited)
+    DOWNLOAD_BANDWIDTH_BYTES = int(os.getenv("TRUETRACK_DOWNLOAD_BANDWIDTH_KBPS") or 0) * 1024
+    # yt-dlp concurrent fragment downloads per job (split among bulk jobs)
+    DOWNLOAD_FRAGMENTS = int(os.getenv("TRUETRACK_DOWNLOAD_FRAGMENTS") or 4)
+    # Bandwidth share of an interactive (--ask) job relative to a bulk one
+    INTERACTIVE_BANDWIDTH_WEIGHT = 3
@@ -3,6 +3,7 @@ import shutil
 import sys
 
 from core.job import Job, JobOptions
+from core.config import Config
 from core.states import PipelineState
 from core.pipeline_factory import create_pipeline
 from cli.summary import render_summary
@@ -38,6 +39,8 @@ def main():
     parser.add_argument("--verbose", action="store_true", help="Show engine logs")
     parser.add_argument("--dry-run", action="store_true", help="Simulate without downloading")
     parser.add_argument("--force-archive", action="store_true", help="Skip metadata matching")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass cached lookups")
+    parser.add_argument("--output-format", choices=Config.OUTPUT_FORMATS, help="Override the output-format policy")
 
     args = parser.parse_args()
 
@@ -46,6 +49,8 @@ def main():
         verbose=args.verbose,
         dry_run=args.dry_run,
         force_archive=args.force_archive,
+        output_format=args.output_format,
+        no_cache=args.no_cache,
     )
 
     job = Job(
@@ -45,6 +45,10 @@ class JobOptions:
     flat: bool = False
     verbose: bool = False
     no_art: bool = False
+    # None = use the AppConfig default (see Config.OUTPUT_FORMATS)
+    output_format: Optional[str] = None
+    # Skip cached lookups (fresh results are still written back)
+    no_cache: bool = False
 
 @dataclass
 class JobResult:
@@ -74,6 +78,8 @@ class IdentityHint:
 
 MAX_STATE_HISTORY = 50
 
+_UNSET = object()
+
 @dataclass
 class Job:
     job_id: str = field(default_factory=lambda: str(uuid4()))
@@ -106,6 +112,8 @@ class Job:
     metadata_candidates: List[Dict[str, Any]] = field(default_factory=list)
     final_metadata: Optional[Dict[str, Any]] = None
     metadata_confidence: Optional[float] = None
+    # iTunes candidates matched while DOWNLOADING ran (consumed by MATCHING_METADATA)
+    speculative_metadata: Optional[Dict[str, Any]] = None
 
     final_path: Optional[str] = None
     result: JobResult = field(default_factory=JobResult)
@@ -114,11 +122,35 @@ class Job:
 
     locked_at: Optional[datetime] = None
     locked_by: Optional[str] = None
+    # Fencing token of the lease this copy was claimed under.
+    # Owned by the store (not part of the serialized payload).
+    lease_token: int = 0
 
     next_run_at: Optional[datetime] = None
     
     resume_from: Optional[PipelineState] = None
 
+    # Dirty tracking (not persisted): assigning a new value to any field
+    # marks the job as changed since it was last loaded from or written to
+    # a store. In-place mutation of nested objects (result, options, lists)
+    # is only caught when accompanied by an assignment such as transition_to().
+    _dirty: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name != "_dirty" and getattr(self, name, _UNSET) is not value:
+            super().__setattr__("_dirty", True)
+        super().__setattr__(name, value)
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def mark_clean(self) -> None:
+        self._dirty = False
+
     def emit(self, message: str) -> None:
         self.last_message = message
 
@@ -218,6 +250,7 @@ class Job:
             "metadata_candidates": self.metadata_candidates,
             "final_metadata": self.final_metadata,
             "metadata_confidence": self.metadata_confidence,
+            "speculative_metadata": self.speculative_metadata,
 
             "final_path": self.final_path,
             "result": asdict(self.result),
@@ -280,6 +313,7 @@ class Job:
         job.metadata_candidates = data.get("metadata_candidates", [])
         job.final_metadata = data.get("final_metadata")
         job.metadata_confidence = data.get("metadata_confidence")
+        job.speculative_metadata = data.get("speculative_metadata")
 
         job.final_path = data.get("final_path")
         job.result = JobResult(**data.get("result", {}))
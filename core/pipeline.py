@@ -1,33 +1,49 @@
 from typing import Callable, Dict, Literal
 from pathlib import Path
 from datetime import datetime, timezone
-import tempfile
 import os
 
 import shutil
 import subprocess
+import logging
 import requests
 
-from ytmusicapi import YTMusic
 from mutagen.id3 import (
     ID3,
     TIT2, TPE1, TALB, TPE2,
-    TRCK, TDRC, APIC,
+    TRCK, TPOS, TDRC, APIC,
 )
 from mutagen.mp3 import MP3
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.flac import Picture
+import mutagen
+import base64
 
 import sys
+import importlib
 import importlib.util
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 from core.job import Job, IdentityHint
 from core.states import PipelineState
 from core.scoring import score_metadata
 
 from utils.paths import ensure_job_temp_dir
+from utils.download_checkpoint import DownloadCheckpoint
 from utils.metadata import search_itunes
-from utils.storage import ensure_dir, safe_filename
+from utils.storage import (
+    ensure_dir, safe_filename,
+    FLAT_LAYOUT, layout_fields, render_layout, move_to_unique_path, atomic_move,
+)
 from utils.tagging import fetch_album_art
+from utils.ytmusic_client import cached_search
 from core.app_config import AppConfig
+from infra.library_index import get_library_index
+from worker.bandwidth import DownloadLease, get_bandwidth_scheduler
+from core.config import Config
+
+logger = logging.getLogger(__name__)
 
 
 # =========================
@@ -112,6 +128,269 @@ def _run_tool(
         ) from e
 
 
+def _stream_tools(
+    job: Job,
+    producer: tuple[str, str | None, list[str]],
+    consumer: tuple[str, str | None, list[str]],
+    stderr,
+) -> None:
+    """
+    Runs `producer | consumer` as two processes joined by an OS pipe.
+
+    Each side is (tool_bin_name, python_module, args). Resolution and
+    invocation metadata follow `_resolve_tool` / `_run_tool`.
+    Failure of either side raises PipelineError tagged with that tool.
+    """
+    if not hasattr(job, "tool_invocations"):
+        job.tool_invocations = []
+
+    cmds = []
+    for tool_bin_name, python_module, args in (producer, consumer):
+        try:
+            base_cmd, source = _resolve_tool(tool_bin_name, python_module=python_module)
+        except PipelineError as e:
+            raise PipelineError(e.code, e.message, category="DEPENDENCY", tool=tool_bin_name) from e
+
+        full_cmd = base_cmd + args
+        job.tool_invocations.append({
+            "tool": tool_bin_name,
+            "source": source,
+            "module": python_module,
+            "cmd": full_cmd,
+        })
+        cmds.append(full_cmd)
+
+    try:
+        upstream = subprocess.Popen(cmds[0], stdout=subprocess.PIPE, stderr=stderr)
+    except OSError as e:
+        raise PipelineError(
+            "EXTERNAL_TOOL_ERROR",
+            f"Execution of '{producer[0]}' failed: {str(e)}",
+            category="DEPENDENCY",
+            tool=producer[0],
+        ) from e
+
+    try:
+        downstream = subprocess.Popen(
+            cmds[1],
+            stdin=upstream.stdout,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+    except OSError as e:
+        upstream.kill()
+        upstream.wait()
+        raise PipelineError(
+            "EXTERNAL_TOOL_ERROR",
+            f"Execution of '{consumer[0]}' failed: {str(e)}",
+            category="DEPENDENCY",
+            tool=consumer[0],
+        ) from e
+    finally:
+        # Only the consumer holds the read end now: if it dies,
+        # the producer gets SIGPIPE instead of blocking forever
+        upstream.stdout.close()
+
+    downstream_rc = downstream.wait()
+    upstream_rc = upstream.wait()
+
+    if upstream_rc != 0:
+        raise PipelineError(
+            "EXTERNAL_TOOL_ERROR",
+            f"Execution of '{producer[0]}' failed with exit code {upstream_rc}",
+            category="CONTENT",
+            tool=producer[0],
+        )
+
+    if downstream_rc != 0:
+        raise PipelineError(
+            "EXTERNAL_TOOL_ERROR",
+            f"Execution of '{consumer[0]}' failed with exit code {downstream_rc}",
+            category="DEPENDENCY",
+            tool=consumer[0],
+        )
+
+
+# =========================
+# In-process yt-dlp
+# =========================
+
+# Substrings of yt-dlp error messages that mean "try again later"
+_YT_DLP_TRANSIENT_MARKERS = (
+    "timed out",
+    "timeout",
+    "temporary failure",
+    "connection reset",
+    "connection refused",
+    "connection aborted",
+    "remote end closed",
+    "network is unreachable",
+    "incompleteread",
+    "http error 429",
+    "http error 5",
+    "unable to download webpage",
+)
+
+@lru_cache(maxsize=1)
+def _load_yt_dlp():
+    """
+    Imports yt_dlp once per process (the import is most of its startup cost).
+    Returns None when the module is not installed.
+    """
+    try:
+        return importlib.import_module("yt_dlp")
+    except ImportError:
+        return None
+
+
+def _classify_yt_dlp_error(yt_dlp, exc: Exception) -> str:
+    """
+    Maps a yt-dlp failure to a PipelineError category.
+    """
+    # DownloadError wraps the original exception in exc_info
+    exc_info = getattr(exc, "exc_info", None)
+    cause = exc_info[1] if exc_info and exc_info[1] is not None else exc
+
+    if isinstance(cause, yt_dlp.utils.PostProcessingError):
+        # ffmpeg missing or broken
+        return "DEPENDENCY"
+
+    networking = getattr(yt_dlp, "networking", None)
+    transport_error = getattr(getattr(networking, "exceptions", None), "TransportError", None)
+    if transport_error and isinstance(cause, transport_error):
+        return "TRANSIENT"
+
+    if isinstance(cause, (TimeoutError, ConnectionError)):
+        return "TRANSIENT"
+
+    message = str(exc).lower()
+    if any(marker in message for marker in _YT_DLP_TRANSIENT_MARKERS):
+        return "TRANSIENT"
+
+    # Unavailable, private, geo-blocked, age-gated, ...
+    return "CONTENT"
+
+
+def _download_progress_hook(job: Job, lease: DownloadLease):
+    """
+    yt-dlp progress hook: reports structured progress to the bandwidth
+    lease (served live by GET /api/workers) and emits a human-readable
+    message every 10%.
+    """
+    last_reported = [-1]
+
+    def hook(d: dict):
+        downloaded = d.get("downloaded_bytes") or 0
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+
+        lease.report(downloaded, d.get("speed"), total=total, eta=d.get("eta"))
+
+        if d.get("status") != "downloading" or not total:
+            return
+
+        percent = min(100, int(downloaded * 100 / total)) // 10 * 10
+        if percent > last_reported[0]:
+            last_reported[0] = percent
+            speed = d.get("speed")
+            suffix = f" ({speed / 1024 / 1024:.1f} MiB/s)" if speed else ""
+            job.emit(f"Downloading: {percent}%{suffix}")
+
+    return hook
+
+
+def _yt_dlp_bandwidth_args(lease: DownloadLease) -> list:
+    """yt-dlp CLI flags for a bandwidth lease (rate fixed at start)."""
+    args = ["--concurrent-fragments", str(lease.fragments)]
+    if lease.rate_limit:
+        args += ["--limit-rate", str(lease.rate_limit)]
+    return args
+
+
+def _download_in_process(job: Job, output_template: str, lease: DownloadLease) -> None:
+    """
+    Runs yt-dlp inside the worker process.
+
+    Same options as the CLI invocation in `_download_subprocess`, minus the
+    interpreter start and module import per job. The rate limit follows
+    the lease while the download runs.
+    """
+    yt_dlp = _load_yt_dlp()
+    url = job.selected_source["url"]
+
+    if not hasattr(job, "tool_invocations"):
+        job.tool_invocations = []
+    job.tool_invocations.append({
+        "tool": "yt-dlp",
+        "source": "in-process",
+        "module": "yt_dlp",
+        "cmd": ["yt_dlp.YoutubeDL", url],
+    })
+
+    ydl_opts = {
+        "format": DOWNLOAD_FORMAT,
+        "outtmpl": output_template,
+        "continuedl": True,
+        "concurrent_fragment_downloads": lease.fragments,
+        "ratelimit": lease.rate_limit,
+        "quiet": not job.options.verbose,
+        "no_warnings": not job.options.verbose,
+        "noprogress": True,
+        "progress_hooks": [_download_progress_hook(job, lease)],
+        "postprocessors": [{
+            "key": "FFmpegExtractAudio",
+            "preferredcodec": "best",
+            "preferredquality": "0",
+        }],
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Downloaders read ratelimit from this dict on every chunk
+            lease.bind(ydl.params)
+            ydl.download([url])
+    except yt_dlp.utils.YoutubeDLError as e:
+        raise PipelineError(
+            "EXTERNAL_TOOL_ERROR",
+            f"yt-dlp failed: {str(e)}",
+            category=_classify_yt_dlp_error(yt_dlp, e),
+            tool="yt-dlp",
+        ) from e
+
+
+def _download_subprocess(job: Job, output_template: str, lease: DownloadLease) -> None:
+    args = [
+        job.selected_source["url"],
+        "-f", DOWNLOAD_FORMAT,
+        "--continue",
+        "--extract-audio",
+        "--audio-quality", "0",
+        "--output", output_template,
+        "--quiet",
+        *_yt_dlp_bandwidth_args(lease),
+    ]
+
+    try:
+        base_cmd, source = _resolve_tool("yt-dlp", python_module="yt_dlp")
+    except PipelineError as e:
+        # Context: Tool resolution failed
+        raise PipelineError(e.code, e.message, category="DEPENDENCY", tool="yt-dlp") from e
+
+    try:
+        _run_tool(
+            job,
+            tool_bin_name="yt-dlp",
+            base_cmd=base_cmd,
+            args=args,
+            source=source,
+            python_module="yt_dlp",
+            stdout=None if job.options.verbose else subprocess.DEVNULL,
+            stderr=None if job.options.verbose else subprocess.DEVNULL,
+        )
+    except PipelineError as e:
+        # Context: Tool execution failed (likely content issue for yt-dlp)
+        raise PipelineError(e.code, e.message, category="CONTENT", tool="yt-dlp") from e
+
+
 # =========================
 # Pipeline Core (STEPPING)
 # =========================
@@ -183,9 +462,8 @@ def handle_init(job: Job):
 def handle_resolving_identity(job: Job):
     job.emit("Searching YouTube Music for matching tracks")
 
-    ytmusic = YTMusic()
     try:
-        results = ytmusic.search(job.raw_query, filter="songs")
+        results = cached_search(job.raw_query, filter="songs", bypass=job.options.no_cache)
     except Exception as e:
         raise PipelineError("YTMUSIC_ERROR", str(e))
 
@@ -235,11 +513,44 @@ def handle_user_intent_selection(job: Job):
 # 3. SEARCHING_MEDIA
 # -------------------------------------------------
 
+def _finalize_if_in_library(job: Job, title: str, artists: list, video_id: str | None = None, album: str | None = None) -> bool:
+    """
+    Short-circuits the job to FINALIZED ("already_exists") when the
+    track is already in the music library. Returns True if it did.
+
+    Only consults what is indexed so far: a cold library is scanned in
+    the background (see WorkerRuntime.start) rather than on the job path.
+    """
+    index = get_library_index()
+    index.scan_in_background(AppConfig.get_music_library_root())
+
+    existing = index.find(title, artists, video_id=video_id)
+    if not existing:
+        return False
+
+    job.emit("Track already in library — skipping")
+
+    job.result.success = True
+    job.result.title = title
+    job.result.artist = ", ".join(artists)
+    job.result.album = album
+    job.result.source = "library"
+    job.result.path = existing
+    job.result.reason = "already_exists"
+
+    job.transition_to(PipelineState.FINALIZED)
+    return True
+
+
 def handle_searching(job: Job):
     hint = job.identity_hint
     if not hint:
         raise PipelineError("NO_IDENTITY", "Missing identity hint")
 
+    # Before any download: is this a duplicate request?
+    if _finalize_if_in_library(job, hint.title, hint.artists, video_id=hint.video_id, album=hint.album):
+        return
+
     job.selected_source = {
         "url": f"https://www.youtube.com/watch?v={hint.video_id}",
         "title": hint.title,
@@ -254,13 +565,43 @@ def handle_searching(job: Job):
 # 4. DOWNLOADING
 # -------------------------------------------------
 
+# yt-dlp format selector for source downloads
+DOWNLOAD_FORMAT = "bestaudio"
+
+# Checkpoint key of the fused download + transcode output (fixed 320k MP3)
+STREAM_FORMAT = "stream-mp3_320"
+
+
+def _download_checkpoints(job: Job, temp_dir: Path) -> tuple[DownloadCheckpoint, DownloadCheckpoint]:
+    """
+    (download, streaming) checkpoints for the job's selected source.
+    """
+    video_id = job.identity_hint.video_id if job.identity_hint else job.job_id
+    return (
+        DownloadCheckpoint(temp_dir, video_id, DOWNLOAD_FORMAT),
+        DownloadCheckpoint(temp_dir, video_id, STREAM_FORMAT),
+    )
+
+
+def _reset_workspace(temp_dir: Path, keep: set) -> None:
+    """Wipes the step workspace, except the paths in `keep`."""
+    for entry in temp_dir.iterdir():
+        if entry in keep:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+
+
 def handle_downloading(job: Job):
     # 1. Pre-step Cleanup (Atomicity Illusion)
-    # Ensure fresh start by wiping the step workspace
+    # Wipe the step workspace, except the download checkpoints of the
+    # selected source: their manifests decide what is complete, partial
+    # files in them are resumed
     temp_dir = ensure_job_temp_dir(job.job_id)
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint, stream_checkpoint = _download_checkpoints(job, temp_dir)
+    _reset_workspace(temp_dir, keep={checkpoint.path, stream_checkpoint.path})
     job.temp_dir = str(temp_dir)
 
     # 2. Timestamp Recording (Start)
@@ -283,46 +624,65 @@ def handle_downloading(job: Job):
         job.transition_to(PipelineState.FINALIZED)
         return
 
-    job.emit(f"Downloading: {job.selected_source['title']}")
+    speculation = _start_speculative_matching(job)
 
-    # temp_dir is already set up and fresh
-    output_template = str(temp_dir / "%(title)s.%(ext)s")
+    # Streaming can only produce the fixed 320k MP3: other policies
+    # need the downloaded source on disk to probe or keep it
+    scheduler = get_bandwidth_scheduler()
 
-    args = [
-        job.selected_source["url"],
-        "-f", "bestaudio",
-        "--extract-audio",
-        "--audio-quality", "0",
-        "--output", output_template,
-        "--quiet",
-    ]
-
-    try:
-        base_cmd, source = _resolve_tool("yt-dlp", python_module="yt_dlp")
-    except PipelineError as e:
-        # Context: Tool resolution failed
-        raise PipelineError(e.code, e.message, category="DEPENDENCY", tool="yt-dlp") from e
-
-    try:
-        _run_tool(
-            job,
-            tool_bin_name="yt-dlp",
-            base_cmd=base_cmd,
-            args=args,
-            source=source,
-            python_module="yt_dlp",
-            stdout=None if job.options.verbose else subprocess.DEVNULL,
-            stderr=None if job.options.verbose else subprocess.DEVNULL,
-        )
-    except PipelineError as e:
-        # Context: Tool execution failed (likely content issue for yt-dlp)
-        raise PipelineError(e.code, e.message, category="CONTENT", tool="yt-dlp") from e
-
-    files = [p for p in temp_dir.iterdir() if p.is_file()]
-    if not files:
-        raise PipelineError("NO_FILE", "yt-dlp produced no output", category="CONTENT")
+    if Config.STREAM_TRANSCODE and _output_format(job) == "mp3_320":
+        try:
+            with scheduler.acquire(job.job_id, interactive=job.options.ask) as lease:
+                _download_streaming(job, stream_checkpoint, lease)
+        except PipelineError as e:
+            # Fallback: the regular two-state path below
+            job.emit(f"Streaming transcode failed ({e.message}) — retrying as download + extract")
+            stream_checkpoint.discard()
+        else:
+            if not hasattr(job, "step_finished_at"):
+                job.step_finished_at = {}
+            job.step_finished_at[job.current_state.name] = datetime.now(timezone.utc)
+
+            _collect_speculative_matching(job, speculation)
+
+            # EXTRACTING already happened in the same pass
+            job.transition_to(PipelineState.MATCHING_METADATA)
+            return
 
-    job.downloaded_file = str(files[0])
+    downloaded = checkpoint.completed()
+    if downloaded:
+        # Finished before a crash / retry: nothing left to fetch
+        job.emit(f"Reusing verified download: {downloaded.name}")
+    else:
+        job.emit(f"Downloading: {job.selected_source['title']}")
+
+        # Same template on every attempt, so yt-dlp finds its partial files
+        output_template = str(checkpoint.prepare() / "%(title)s.%(ext)s")
+
+        with scheduler.acquire(job.job_id, interactive=job.options.ask) as lease:
+            if Config.DOWNLOAD_BACKEND != "subprocess" and _load_yt_dlp() is not None:
+                try:
+                    _download_in_process(job, output_template, lease)
+                except PipelineError:
+                    raise
+                except Exception as e:
+                    # Fallback: an embedding problem, not a download failure.
+                    # The CLI resumes whatever was already fetched.
+                    job.emit(f"In-process yt-dlp failed ({e}) — retrying with the yt-dlp CLI")
+                    _download_subprocess(job, output_template, lease)
+            else:
+                _download_subprocess(job, output_template, lease)
+
+        files = checkpoint.outputs()
+        if not files:
+            raise PipelineError("NO_FILE", "yt-dlp produced no output", category="CONTENT")
+
+        downloaded = files[0]
+        checkpoint.commit(downloaded)
+
+    job.downloaded_file = str(downloaded)
+
+    _collect_speculative_matching(job, speculation)
 
     # 3. Timestamp Recording (End)
     if not hasattr(job, "step_finished_at"):
@@ -332,50 +692,229 @@ def handle_downloading(job: Job):
     job.transition_to(PipelineState.EXTRACTING)
 
 
+# -------------------------------------------------
+# Speculative metadata matching
+# -------------------------------------------------
+
+# iTunes lookups (and art prefetch) overlapped with downloads
+_speculation_executor = ThreadPoolExecutor(
+    max_workers=Config.SPECULATION_WORKERS,
+    thread_name_prefix="truetrack-speculate",
+)
+
+
+def _identity_key(hint: IdentityHint) -> str:
+    """Identifies the hint a speculative result was computed for."""
+    return "|".join([hint.title or "", ", ".join(hint.artists), str(hint.duration_ms or 0)])
+
+
+def _speculate(hint: IdentityHint, bypass_cache: bool, prefetch_art: bool) -> list | None:
+    try:
+        scored = _lookup_metadata(hint, bypass_cache=bypass_cache)
+    except requests.RequestException:
+        return None
+
+    # Warm the art cache for TAGGING when the match will not need a user pick
+    if prefetch_art and scored and scored[0]["_score"] >= METADATA_CONFIDENCE_THRESHOLD:
+        try:
+            fetch_album_art(scored[0])
+        except requests.RequestException:
+            pass
+
+    return scored
+
+
+def _start_speculative_matching(job: Job) -> Future | None:
+    """
+    Starts MATCHING_METADATA's lookup in the background, if it is going
+    to be needed. Its result is stashed on the job by
+    `_collect_speculative_matching`.
+    """
+    hint = job.identity_hint
+    if not Config.SPECULATIVE_MATCHING or job.options.force_archive or not hint:
+        return None
+
+    return _speculation_executor.submit(
+        _speculate,
+        hint,
+        job.options.no_cache,
+        not job.options.no_art,
+    )
+
+
+def _collect_speculative_matching(job: Job, speculation: Future | None) -> None:
+    if speculation is None:
+        return
+
+    try:
+        scored = speculation.result(timeout=Config.SPECULATION_JOIN_SECONDS)
+    except FutureTimeoutError:
+        # Still useful: the lookup lands in the persistent iTunes cache
+        return
+    except Exception as e:
+        # Best effort only: MATCHING_METADATA runs the lookup itself
+        logger.debug(f"Speculative metadata matching failed for job {job.job_id}: {e}")
+        return
+
+    if scored is None:
+        return
+
+    job.speculative_metadata = {
+        "identity": _identity_key(job.identity_hint),
+        "candidates": scored,
+    }
+
+
+def _download_streaming(job: Job, checkpoint: DownloadCheckpoint, lease: DownloadLease) -> None:
+    """
+    Fused DOWNLOADING + EXTRACTING.
+
+    yt-dlp writes the source stream to stdout, ffmpeg transcodes it from
+    stdin as bytes arrive. The source file never touches disk, and the
+    MP3 only appears under its final name once both tools succeed.
+
+    A pipe cannot be resumed: an interrupted stream starts over, but a
+    completed (committed) one is reused.
+    """
+    output_path = checkpoint.completed()
+    if output_path:
+        job.emit(f"Reusing verified download: {output_path.name}")
+        job.downloaded_file = None
+        job.extracted_file = str(output_path)
+        return
+
+    job.emit(f"Downloading and converting: {job.selected_source['title']}")
+
+    checkpoint.discard()
+    checkpoint.prepare()
+
+    name = safe_filename(job.selected_source.get("title") or "") or job.job_id
+    output_path = checkpoint.path / f"{name}.mp3"
+    partial_path = checkpoint.path / f"{name}.mp3.part"
+
+    stderr = None if job.options.verbose else subprocess.DEVNULL
+
+    _stream_tools(
+        job,
+        producer=("yt-dlp", "yt_dlp", [
+            job.selected_source["url"],
+            "-f", DOWNLOAD_FORMAT,
+            "--output", "-",
+            "--quiet",
+            *_yt_dlp_bandwidth_args(lease),
+        ]),
+        consumer=("ffmpeg", None, [
+            "-y", "-i", "pipe:0",
+            "-ab", "320k",
+            "-f", "mp3",
+            str(partial_path),
+        ]),
+        stderr=stderr,
+    )
+
+    if not partial_path.exists() or partial_path.stat().st_size == 0:
+        raise PipelineError("NO_FILE", "Streaming transcode produced no output", category="CONTENT")
+
+    os.replace(partial_path, output_path)
+    checkpoint.commit(output_path)
+
+    job.downloaded_file = None
+    job.extracted_file = str(output_path)
+
+
 # -------------------------------------------------
 # 5. EXTRACTING
 # -------------------------------------------------
 
+# Containers handle_tagging can write natively
+NATIVE_CONTAINERS = (".mp3", ".m4a", ".mp4", ".opus", ".ogg")
+
+# Standard MP3 CBR steps used by the "mp3_matched" policy
+MP3_BITRATES = (128, 160, 192, 256, 320)
+
+
+def _output_format(job: Job) -> str:
+    return job.options.output_format or AppConfig.get_output_format()
+
+
+def _probe_bitrate_kbps(path: Path) -> int | None:
+    """
+    Source bitrate from container headers (no decode, no subprocess).
+    Falls back to size / duration when the header carries no bitrate.
+    """
+    try:
+        audio = mutagen.File(path)
+    except Exception:
+        return None
+
+    if audio is None or audio.info is None:
+        return None
+
+    bitrate = getattr(audio.info, "bitrate", 0) or 0
+    if not bitrate:
+        length = getattr(audio.info, "length", 0) or 0
+        if length <= 0:
+            return None
+        bitrate = path.stat().st_size * 8 / length
+
+    return int(bitrate / 1000)
+
+
+def _matched_mp3_bitrate(source_kbps: int | None) -> int:
+    """
+    Smallest standard MP3 bitrate at or above the source.
+    Unknown sources keep the legacy 320k.
+    """
+    if not source_kbps:
+        return MP3_BITRATES[-1]
+
+    for bitrate in MP3_BITRATES:
+        if bitrate >= source_kbps:
+            return bitrate
+
+    return MP3_BITRATES[-1]
+
+
+
 def handle_extracting(job: Job):
-    # 1. Pre-step Cleanup (Atomicity Illusion) with Input Preservation
+    # 1. Pre-step Cleanup (Atomicity Illusion)
+    # Wipe the previous attempt's output, keeping the download checkpoints
+    # (the input lives in one, validated by its manifest)
     temp_dir = ensure_job_temp_dir(job.job_id)
-    
-    preserved_input_path = None
-    backup_path = None
-
-    # Check if we need to save the input file from the blast zone
+    keep = {checkpoint.path for checkpoint in _download_checkpoints(job, temp_dir)}
     if job.downloaded_file:
-        input_file = Path(job.downloaded_file)
-        if input_file.exists() and temp_dir in input_file.parents:
-            # Create a safe stash outside the blast zone
-            backup_path = Path(tempfile.mkdtemp()) / input_file.name
-            shutil.move(input_file, backup_path)
-            preserved_input_path = input_file  # Remember where it was
-
-    # Nuke it
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir(parents=True, exist_ok=True)
+        keep.add(Path(job.downloaded_file))
+    _reset_workspace(temp_dir, keep=keep)
     job.temp_dir = str(temp_dir)
 
-    # Restore logic
-    if preserved_input_path and backup_path and backup_path.exists():
-        # Ensure the subdirectory structure exists if it was deep (unlikely but safe)
-        preserved_input_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(backup_path, preserved_input_path)
-        shutil.rmtree(backup_path.parent) # Cleanup the stash dir
-
     # 2. Timestamp Recording (Start)
     if not hasattr(job, "step_started_at"):
         job.step_started_at = {}
     job.step_started_at[job.current_state.name] = datetime.now(timezone.utc)
 
-    job.emit("Converting audio to MP3 (320kbps)")
-
     input_path = Path(job.downloaded_file)
-    output_path = input_path.with_suffix(".mp3")
+    policy = _output_format(job)
+    suffix = input_path.suffix.lower()
+
+    if suffix == ".mp3" or (policy == "native" and suffix in NATIVE_CONTAINERS):
+        # Already taggable as-is: no encode at all
+        job.emit(f"Keeping source audio ({suffix.lstrip('.')})")
+        _finish_extracting(job, input_path)
+        return
+
+    bitrate = 320
+    if policy != "mp3_320":
+        source_kbps = _probe_bitrate_kbps(input_path)
+        bitrate = _matched_mp3_bitrate(source_kbps)
+        if policy == "native":
+            job.emit(f"Source container {suffix or '(none)'} cannot be tagged natively — encoding to MP3")
 
-    args = ["-y", "-i", job.downloaded_file, "-ab", "320k", str(output_path)]
+    job.emit(f"Converting audio to MP3 ({bitrate}kbps)")
+
+    # Next to the checkpoint, not inside it: only downloads live there
+    output_path = temp_dir / f"{input_path.stem}.mp3"
+
+    args = ["-y", "-i", job.downloaded_file, "-ab", f"{bitrate}k", str(output_path)]
     
     try:
         base_cmd, source = _resolve_tool("ffmpeg")
@@ -393,6 +932,10 @@ def handle_extracting(job: Job):
         # Context: Any failure in ffmpeg (resolution or exec) is DEPENDENCY
         raise PipelineError(e.code, e.message, category="DEPENDENCY", tool="ffmpeg") from e
 
+    _finish_extracting(job, output_path)
+
+
+def _finish_extracting(job: Job, output_path: Path):
     job.extracted_file = str(output_path)
 
     # 3. Timestamp Recording (End)
@@ -407,24 +950,16 @@ def handle_extracting(job: Job):
 # 6. MATCHING_METADATA
 # -------------------------------------------------
 
-def handle_matching_metadata(job: Job):
-    job.emit("Searching iTunes for official metadata")
+# Below this score the user picks the metadata
+METADATA_CONFIDENCE_THRESHOLD = 60
 
-    if job.options.force_archive:
-        job.transition_to(PipelineState.ARCHIVING)
-        return
 
-    hint = job.identity_hint
-    try:
-        results = search_itunes(hint.title, ", ".join(hint.artists))
-    except requests.RequestException:
-        job.emit("Metadata search failed (network error) — falling back to archive")
-        job.transition_to(PipelineState.ARCHIVING)
-        return
-
-    if not results:
-        job.transition_to(PipelineState.ARCHIVING)
-        return
+def _lookup_metadata(hint: IdentityHint, bypass_cache: bool = False) -> list:
+    """
+    iTunes candidates for `hint`, scored and best first.
+    Raises requests.RequestException on network failure.
+    """
+    results = search_itunes(hint.title, ", ".join(hint.artists), bypass_cache=bypass_cache)
 
     scored = []
     for r in results:
@@ -438,11 +973,40 @@ def handle_matching_metadata(job: Job):
         scored.append(r)
 
     scored.sort(key=lambda x: x["_score"], reverse=True)
+    return scored
+
+
+def handle_matching_metadata(job: Job):
+    job.emit("Searching iTunes for official metadata")
+
+    if job.options.force_archive:
+        job.transition_to(PipelineState.ARCHIVING)
+        return
+
+    hint = job.identity_hint
+    speculative = job.speculative_metadata
+    job.speculative_metadata = None
+
+    if speculative and speculative.get("identity") == _identity_key(hint):
+        # Already looked up while the track was downloading
+        scored = speculative["candidates"]
+    else:
+        try:
+            scored = _lookup_metadata(hint, bypass_cache=job.options.no_cache)
+        except requests.RequestException:
+            job.emit("Metadata search failed (network error) — falling back to archive")
+            job.transition_to(PipelineState.ARCHIVING)
+            return
+
+    if not scored:
+        job.transition_to(PipelineState.ARCHIVING)
+        return
+
     job.metadata_candidates = scored
     job.final_metadata = scored[0]
     job.metadata_confidence = scored[0]["_score"]
 
-    if job.metadata_confidence < 60:
+    if job.metadata_confidence < METADATA_CONFIDENCE_THRESHOLD:
         job.transition_to(PipelineState.USER_METADATA_SELECTION)
         return
 
@@ -462,10 +1026,38 @@ def handle_metadata_user_selection(job: Job):
 # -------------------------------------------------
 
 def handle_tagging(job: Job):
+    meta = job.final_metadata
+
+    # Official metadata can reveal a duplicate the YouTube identity did not
+    if _finalize_if_in_library(
+        job,
+        meta["trackName"],
+        [meta["artistName"]],
+        video_id=job.identity_hint.video_id if job.identity_hint else None,
+        album=meta.get("collectionName"),
+    ):
+        return
+
     job.emit("Embedding metadata and album art")
 
-    meta = job.final_metadata
-    audio = MP3(job.extracted_file, ID3=ID3)
+    try:
+        art = fetch_album_art(meta)
+    except requests.RequestException:
+        art = None
+
+    suffix = Path(job.extracted_file).suffix.lower()
+    if suffix in (".m4a", ".mp4"):
+        _tag_mp4(job.extracted_file, meta, art)
+    elif suffix in (".opus", ".ogg"):
+        _tag_vorbis_comments(job.extracted_file, meta, art)
+    else:
+        _tag_mp3(job.extracted_file, meta, art)
+
+    job.transition_to(PipelineState.STORING)
+
+
+def _tag_mp3(path: str, meta: dict, art: bytes | None):
+    audio = MP3(path, ID3=ID3)
 
     if audio.tags is None:
         audio.add_tags()
@@ -474,27 +1066,92 @@ def handle_tagging(job: Job):
     audio.tags.add(TPE1(encoding=3, text=meta["artistName"]))
     audio.tags.add(TALB(encoding=3, text=meta["collectionName"]))
 
+    # Album artist and disc feed the library layout (see layout_fields);
+    # written so cli/migrate_layout.py renders the same path from the file
+    if meta.get("collectionArtistName"):
+        audio.tags.add(TPE2(encoding=3, text=meta["collectionArtistName"]))
+
     if meta.get("trackNumber"):
         audio.tags.add(TRCK(encoding=3, text=str(meta["trackNumber"])))
 
+    if meta.get("discNumber"):
+        audio.tags.add(TPOS(encoding=3, text=str(meta["discNumber"])))
+
     if meta.get("releaseDate"):
         audio.tags.add(TDRC(encoding=3, text=meta["releaseDate"][:4]))
 
-    try:
-        art = fetch_album_art(meta)
-        if art:
-            audio.tags.add(APIC(
-                encoding=3,
-                mime="image/jpeg",
-                type=3,
-                desc="Cover",
-                data=art,
-            ))
-    except requests.RequestException:
-        pass
+    if art:
+        audio.tags.add(APIC(
+            encoding=3,
+            mime="image/jpeg",
+            type=3,
+            desc="Cover",
+            data=art,
+        ))
+
+    audio.save()
+
+
+def _tag_mp4(path: str, meta: dict, art: bytes | None):
+    audio = MP4(path)
+
+    if audio.tags is None:
+        audio.add_tags()
+
+    audio.tags["\xa9nam"] = [meta["trackName"]]
+    audio.tags["\xa9ART"] = [meta["artistName"]]
+    audio.tags["\xa9alb"] = [meta["collectionName"]]
+
+    if meta.get("collectionArtistName"):
+        audio.tags["aART"] = [meta["collectionArtistName"]]
+
+    if meta.get("trackNumber"):
+        audio.tags["trkn"] = [(int(meta["trackNumber"]), int(meta.get("trackCount") or 0))]
+
+    if meta.get("discNumber"):
+        audio.tags["disk"] = [(int(meta["discNumber"]), int(meta.get("discCount") or 0))]
+
+    if meta.get("releaseDate"):
+        audio.tags["\xa9day"] = [meta["releaseDate"][:4]]
+
+    if art:
+        audio.tags["covr"] = [MP4Cover(art, imageformat=MP4Cover.FORMAT_JPEG)]
+
+    audio.save()
+
+
+def _tag_vorbis_comments(path: str, meta: dict, art: bytes | None):
+    # Ogg Opus / Ogg Vorbis: mutagen picks the matching class
+    audio = mutagen.File(path)
+
+    if audio.tags is None:
+        audio.add_tags()
+
+    audio["title"] = meta["trackName"]
+    audio["artist"] = meta["artistName"]
+    audio["album"] = meta["collectionName"]
+
+    if meta.get("collectionArtistName"):
+        audio["albumartist"] = meta["collectionArtistName"]
+
+    if meta.get("trackNumber"):
+        audio["tracknumber"] = str(meta["trackNumber"])
+
+    if meta.get("discNumber"):
+        audio["discnumber"] = str(meta["discNumber"])
+
+    if meta.get("releaseDate"):
+        audio["date"] = meta["releaseDate"][:4]
+
+    if art:
+        picture = Picture()
+        picture.type = 3
+        picture.mime = "image/jpeg"
+        picture.desc = "Cover"
+        picture.data = art
+        audio["metadata_block_picture"] = base64.b64encode(picture.write()).decode("ascii")
 
     audio.save()
-    job.transition_to(PipelineState.STORING)
 
 
 # -------------------------------------------------
@@ -507,11 +1164,28 @@ def handle_storage(job: Job):
     library_root = AppConfig.get_music_library_root()
     ensure_dir(library_root)
 
-    title = safe_filename(job.final_metadata["trackName"])
-    artist = safe_filename(job.final_metadata["artistName"])
-    final_path = library_root / f"{title} - {artist}.mp3"
+    meta = job.final_metadata
+    title = safe_filename(meta["trackName"])
+    artist = safe_filename(meta["artistName"])
+
+    layout = FLAT_LAYOUT if job.options.flat else AppConfig.get_library_layout()
+    fields = layout_fields(
+        meta["trackName"],
+        meta["artistName"],
+        album=meta.get("collectionName"),
+        albumartist=meta.get("collectionArtistName"),
+        track=meta.get("trackNumber"),
+        disc=meta.get("discNumber"),
+        year=meta.get("releaseDate"),
+    )
+    final_path = library_root / render_layout(layout, fields, Path(job.extracted_file).suffix)
+    ensure_dir(final_path.parent)
 
-    if final_path.exists():
+    # Same rendered path = same title/artist (and album/track, if templated).
+    # The move never replaces: of two jobs racing for one path, one wins
+    try:
+        atomic_move(job.extracted_file, final_path, replace=False)
+    except FileExistsError:
         job.result.success = True
         job.result.title = title
         job.result.artist = artist
@@ -523,7 +1197,12 @@ def handle_storage(job: Job):
         job.transition_to(PipelineState.FINALIZED)
         return
 
-    shutil.move(job.extracted_file, final_path)
+    get_library_index().add(
+        final_path,
+        job.final_metadata["trackName"],
+        job.final_metadata["artistName"],
+        video_id=job.identity_hint.video_id if job.identity_hint else None,
+    )
 
     job.result.success = True
     job.result.title = title
@@ -547,11 +1226,18 @@ def handle_archiving(job: Job):
     ensure_dir(archive_dir)
 
     hint = job.identity_hint
-    title = safe_filename(hint.title)
-    artist = safe_filename(hint.artists[0] if hint.artists else "Unknown")
 
-    final_path = archive_dir / f"{title} - {artist}.mp3"
-    shutil.move(job.extracted_file, final_path)
+    # Same layout as verified tracks, from the unverified identity
+    layout = FLAT_LAYOUT if job.options.flat else AppConfig.get_library_layout()
+    fields = layout_fields(
+        hint.title,
+        hint.artists[0] if hint.artists else None,
+        album=hint.album,
+    )
+    target = archive_dir / render_layout(layout, fields, Path(job.extracted_file).suffix)
+
+    ensure_dir(target.parent)
+    final_path = move_to_unique_path(job.extracted_file, target)
 
     job.result.archived = True
     job.result.title = hint.title
@@ -0,0 +1,177 @@
+import os
+import socket
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SOCKET_SUFFIX = ".sock"
+LISTENER_POLL_SECONDS = 5.0
+
+def _supports_unix_datagrams() -> bool:
+    return hasattr(socket, "AF_UNIX") and os.name != "nt"
+
+class JobNotifier:
+    """
+    Wakes idle workers when a job becomes runnable.
+
+    In-process:
+    - a Condition plus a generation counter; waiters pass the generation
+      they observed before checking for work, so a notify that lands in
+      between is never lost
+
+    Cross-process (Unix only):
+    - every listening process binds a datagram socket in a shared
+      rendezvous directory derived from `channel`
+    - notify() sends one byte to every socket in that directory
+    - a listener thread turns received bytes into local notifications
+
+    Where Unix sockets are unavailable, `cross_process` is False and
+    callers should keep a short polling timeout.
+    """
+
+    def __init__(self, channel: Optional[str] = None):
+        self._cond = threading.Condition()
+        self._generation = 0
+
+        self._channel_dir: Optional[Path] = None
+        if channel and _supports_unix_datagrams():
+            digest = hashlib.sha1(os.path.abspath(channel).encode()).hexdigest()[:12]
+            self._channel_dir = Path(tempfile.gettempdir()) / f"truetrack-notify-{digest}"
+
+        self._sender: Optional[socket.socket] = None
+        self._listener: Optional[socket.socket] = None
+        self._listener_path: Optional[Path] = None
+        self._listener_pid: Optional[int] = None
+
+    @property
+    def cross_process(self) -> bool:
+        return self._channel_dir is not None
+
+    @property
+    def generation(self) -> int:
+        with self._cond:
+            return self._generation
+
+    # -------------------------------------------------
+    # Signalling
+    # -------------------------------------------------
+
+    def notify(self) -> None:
+        self._notify_local()
+        self._broadcast()
+
+    def _notify_local(self) -> None:
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _broadcast(self) -> None:
+        if not self._channel_dir or not self._channel_dir.exists():
+            return
+
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+
+        own = str(self._listener_path) if self._listener_pid == os.getpid() else None
+
+        for entry in os.scandir(self._channel_dir):
+            if not entry.name.endswith(SOCKET_SUFFIX) or entry.path == own:
+                continue
+
+            try:
+                self._sender.sendto(b"1", entry.path)
+            except BlockingIOError:
+                # Receiver already has pending wakeups queued
+                pass
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Listener process is gone: drop its stale socket
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.debug(f"Job notification to {entry.path} failed: {e}")
+
+    # -------------------------------------------------
+    # Waiting
+    # -------------------------------------------------
+
+    def wait(self, generation: int, timeout: Optional[float]) -> bool:
+        """
+        Block until the generation moves past `generation` or `timeout` expires.
+        Returns True if woken by a notification.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._generation != generation,
+                timeout=timeout,
+            )
+
+    def listen(self) -> None:
+        """
+        Start receiving cross-process notifications (idempotent per process).
+        """
+        if not self._channel_dir or self._listener_pid == os.getpid():
+            return
+
+        path = self._channel_dir / f"{os.getpid()}-{id(self)}{SOCKET_SUFFIX}"
+        if path.exists():
+            path.unlink()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self._channel_dir.mkdir(parents=True, exist_ok=True)
+            sock.bind(str(path))
+        except FileNotFoundError:
+            # The last listener removed the directory in between (see close)
+            self._channel_dir.mkdir(parents=True, exist_ok=True)
+            sock.bind(str(path))
+
+        self._listener = sock
+        self._listener_path = path
+        self._listener_pid = os.getpid()
+
+        thread = threading.Thread(
+            target=self._listen_loop,
+            args=(sock,),
+            name="truetrack-job-notifier",
+            daemon=True,
+        )
+        thread.start()
+
+    def _listen_loop(self, sock: socket.socket) -> None:
+        # Short receive timeout so close() is observed promptly
+        sock.settimeout(LISTENER_POLL_SECONDS)
+
+        while self._listener is sock:
+            try:
+                sock.recv(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self._notify_local()
+
+    def close(self) -> None:
+        if self._listener and self._listener_pid == os.getpid():
+            self._listener.close()
+            try:
+                self._listener_path.unlink()
+            except OSError:
+                pass
+
+            # Last listener out removes the rendezvous directory
+            try:
+                self._channel_dir.rmdir()
+            except OSError:
+                pass
+
+        self._listener = None
+        self._listener_path = None
+        self._listener_pid = None
@@ -1,15 +1,41 @@
+import time
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional, Iterable, Dict
-from datetime import datetime
+from typing import Optional, Iterable, Dict, Collection, Callable, Any, List
+from datetime import datetime, timezone
 
 from core.job import Job
 from core.states import PipelineState
+from infra.job_notifier import JobNotifier
+
+LOCK_TTL_SECONDS = 60
+
+# A worker process's published stats are dropped this long after its
+# last snapshot (it crashed or was killed without clearing them)
+WORKER_STATS_TTL_SECONDS = 10
+
+class LeaseLostError(Exception):
+    """
+    A fenced write was rejected: the job's lease was taken over
+    (expired and re-claimed, or swept) since this worker claimed it.
+    """
+
+    def __init__(self, job_id: str, lease_token: int):
+        self.job_id = job_id
+        self.lease_token = lease_token
+        super().__init__(f"Lease {lease_token} on job {job_id} is no longer held")
 
 class JobStore(ABC):
     """
     Abstract persistence interface for Jobs.
+
+    Also owns work notification: writes that may make a job runnable
+    wake idle workers (see JobNotifier) instead of workers polling.
     """
 
+    def __init__(self, notifier: Optional[JobNotifier] = None):
+        self.notifier = notifier or JobNotifier()
+
     @abstractmethod
     def create(self, job: Job) -> None:
         """Persist a newly created job."""
@@ -20,18 +46,167 @@ class JobStore(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def update(self, job: Job) -> None:
+    def update(self, job: Job, fenced: bool = False) -> None:
+        """
+        Persist a job.
+
+        fenced=True: only write if `job.lease_token` is still the current
+        lease, else raise LeaseLostError (workers use this for every write).
+        """
         raise NotImplementedError
 
     @abstractmethod
     def next_runnable(self) -> Optional[str]:
         raise NotImplementedError
 
+    @abstractmethod
+    def claim_next(
+        self,
+        worker_id: str,
+        ttl: int = LOCK_TTL_SECONDS,
+        states: Optional[Collection[PipelineState]] = None,
+    ) -> Optional[Job]:
+        """
+        Atomically pick the next runnable job and lock it for `worker_id`.
+
+        `states` restricts the claim to jobs currently in one of those
+        states (stage-specific worker pools).
+
+        Returns the locked Job, or None if nothing is runnable.
+        """
+        raise NotImplementedError
+
+    def count_runnable(self, states: Optional[Collection[PipelineState]] = None) -> int:
+        """Number of jobs waiting to be claimed (optionally per state set)."""
+        return 0
+
     def list(self) -> Iterable[str]:
         return []
 
+    # -------------------------------------------------
+    # Leases
+    # -------------------------------------------------
+
+    def renew_lease(self, job_id: str, lease_token: int) -> bool:
+        """
+        Heartbeat: push the lock's expiry forward.
+        Returns False if the lease is no longer held.
+        """
+        return True
+
+    def release_orphaned_leases(self, is_orphaned: Callable[[str], bool]) -> int:
+        """
+        Unlock jobs whose `locked_by` owner is known to be dead,
+        without waiting for the TTL. Returns the number released.
+        """
+        return 0
+
+    # -------------------------------------------------
+    # Worker stats
+    # -------------------------------------------------
+
+    def publish_worker_stats(self, process_id: str, stats: Dict[str, Any]) -> None:
+        """
+        Record a worker process's pool and bandwidth snapshot, so the
+        API can report workers running in other processes.
+        """
+
+    def clear_worker_stats(self, process_id: str) -> None:
+        """Drop a worker process's snapshot (clean shutdown)."""
+
+    def worker_stats(self, max_age: float = WORKER_STATS_TTL_SECONDS) -> List[Dict[str, Any]]:
+        """Snapshots published within the last `max_age` seconds."""
+        return []
+
+    # -------------------------------------------------
+    # Work notification
+    # -------------------------------------------------
+
+    def notify_work(self, job: Optional[Job] = None) -> None:
+        """
+        Wake idle workers. Writes for terminal or paused jobs are skipped:
+        they can never make work runnable.
+        """
+        if job is not None and (
+            job.current_state in (
+                PipelineState.FINALIZED,
+                PipelineState.FAILED,
+                PipelineState.CANCELLED,
+            )
+            or job.current_state.name.startswith("USER_")
+        ):
+            return
+
+        self.notifier.notify()
+
+    def work_generation(self) -> int:
+        return self.notifier.generation
+
+    def wait_for_work(self, generation: int, timeout: Optional[float]) -> bool:
+        """
+        Sleep until notified (since `generation` was read) or `timeout`.
+        """
+        return self.notifier.wait(generation, timeout)
+
+    def next_wakeup_at(self, ttl: int = LOCK_TTL_SECONDS) -> Optional[datetime]:
+        """
+        Earliest moment a currently blocked job (delayed retry or
+        expiring lock) becomes runnable, or None if there is none.
+        """
+        return None
+
+class JobUnitOfWork:
+    """
+    Coalesces all writes for one worker step into a single persist.
+
+    Usage:
+
+        with JobUnitOfWork(store, job) as uow:
+            ...mutate uow.job...
+
+    On normal exit the lock is released and the job is written once,
+    only if it is dirty. `replace()` swaps the job to persist (e.g. the
+    externally cancelled copy). `flush()` may be called early when
+    ordering matters; the exit flush then becomes a no-op.
+    `checkpoint()` persists while keeping the lock (multi-step leases).
+
+    All writes are fenced by the job's lease token: a worker whose lease
+    was taken over gets LeaseLostError instead of overwriting newer state.
+
+    If the block raises, nothing is written: the lock expires by TTL.
+    """
+
+    def __init__(self, store: "JobStore", job: Job):
+        self.store = store
+        self.job = job
+
+    def replace(self, job: Job) -> None:
+        self.job = job
+
+    def checkpoint(self) -> None:
+        """Persist progress WITHOUT releasing the lock."""
+        if self.job.is_dirty:
+            self.store.update(self.job, fenced=True)
+
+    def flush(self) -> None:
+        self.job.release_lock()
+        if self.job.is_dirty:
+            self.store.update(self.job, fenced=True)
+
+    def __enter__(self) -> "JobUnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+
 def is_runnable(job: Job) -> bool:
-    if job.current_state in (PipelineState.FINALIZED, PipelineState.FAILED):
+    """Whether the job still has pipeline steps to run (now or later)."""
+    if job.current_state in (
+        PipelineState.FINALIZED,
+        PipelineState.FAILED,
+        PipelineState.CANCELLED,
+    ):
         return False
 
     if job.current_state.name.startswith("USER_"):
@@ -39,17 +214,46 @@ def is_runnable(job: Job) -> bool:
 
     return True
 
+def is_claimable(job: Job, now: datetime, ttl: int = LOCK_TTL_SECONDS) -> bool:
+    """
+    Runnable right now: not waiting for a delayed retry and not held
+    under an unexpired lease (same rules as the SQLite store's claim).
+    """
+    if not is_runnable(job):
+        return False
+
+    if job.next_run_at and job.next_run_at > now:
+        return False
+
+    if job.is_locked(now, ttl):
+        return False
+
+    return True
+
 class InMemoryJobStore(JobStore):
     """
     In-memory JobStore.
 
     ⚠️ Not crash-safe.
     ✅ Correct by contract.
+
+    `_queue` holds each runnable job once, least recently written
+    first (the SQLite store's updated_at order). Jobs that are leased
+    or delayed stay queued and are skipped until claimable.
     """
 
     def __init__(self):
+        super().__init__()
         self._jobs: Dict[str, Job] = {}
         self._queue: list[str] = []
+        self._lease_tokens: Dict[str, int] = {}
+        self._worker_stats: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id in self._queue:
+            self._queue.remove(job_id)
+        self._queue.append(job_id)
 
     def create(self, job: Job) -> None:
         if job.job_id in self._jobs:
@@ -60,33 +264,119 @@ class InMemoryJobStore(JobStore):
         job.updated_at = now
 
         self._jobs[job.job_id] = job
-        self._queue.append(job.job_id)
+        self._enqueue(job.job_id)
+        job.mark_clean()
+
+        self.notify_work(job)
 
     def get(self, job_id: str) -> Optional[Job]:
         return self._jobs.get(job_id)
 
-    def update(self, job: Job) -> None:
+    def update(self, job: Job, fenced: bool = False) -> None:
         if job.job_id not in self._jobs:
             raise KeyError(f"Job {job.job_id} does not exist")
 
+        if fenced and job.lease_token != self._lease_tokens.get(job.job_id, 0):
+            raise LeaseLostError(job.job_id, job.lease_token)
+
         job.updated_at = datetime.utcnow()
         self._jobs[job.job_id] = job
+        job.mark_clean()
 
         if is_runnable(job):
-            self._queue.append(job.job_id)
+            self._enqueue(job.job_id)
+            self.notify_work(job)
 
     def next_runnable(self) -> Optional[str]:
-        while self._queue:
-            job_id = self._queue.pop(0)
-            job = self._jobs.get(job_id)
+        return self._find_claimable(None, LOCK_TTL_SECONDS)
 
-            if job is None:
-                continue
+    def claim_next(
+        self,
+        worker_id: str,
+        ttl: int = LOCK_TTL_SECONDS,
+        states: Optional[Collection[PipelineState]] = None,
+    ) -> Optional[Job]:
+        with self._lock:
+            job_id = self._find_claimable(states, ttl)
+            if not job_id:
+                return None
 
-            if is_runnable(job):
-                return job_id
+            job = self._jobs[job_id]
+            job.acquire_lock(worker_id, datetime.now(timezone.utc))
+            job.lease_token = self._lease_tokens.get(job_id, 0) + 1
+            self._lease_tokens[job_id] = job.lease_token
+            return job
 
-        return None
+    def renew_lease(self, job_id: str, lease_token: int) -> bool:
+        job = self._jobs.get(job_id)
+        if not job or not job.locked_at or self._lease_tokens.get(job_id) != lease_token:
+            return False
+        job.locked_at = datetime.now(timezone.utc)
+        return True
+
+    def release_orphaned_leases(self, is_orphaned: Callable[[str], bool]) -> int:
+        released = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job.locked_by and is_orphaned(job.locked_by):
+                    job.release_lock()
+                    self._lease_tokens[job.job_id] = self._lease_tokens.get(job.job_id, 0) + 1
+                    if is_runnable(job):
+                        self._enqueue(job.job_id)
+                    released += 1
+        return released
+
+    def _find_claimable(
+        self,
+        states: Optional[Collection[PipelineState]],
+        ttl: int,
+    ) -> Optional[str]:
+        """
+        Interactive (--ask) jobs first, then queue order. Jobs that can
+        never run again leave the queue; leased or delayed ones stay.
+        """
+        now = datetime.now(timezone.utc)
+
+        self._queue = [
+            job_id for job_id in self._queue
+            if (job := self._jobs.get(job_id)) is not None and is_runnable(job)
+        ]
+
+        candidates = [
+            (index, job_id) for index, job_id in enumerate(self._queue)
+            if (states is None or self._jobs[job_id].current_state in states)
+            and is_claimable(self._jobs[job_id], now, ttl)
+        ]
+        if not candidates:
+            return None
+
+        _, job_id = min(
+            candidates,
+            key=lambda c: (not self._jobs[c[1]].options.ask, c[0]),
+        )
+        return job_id
+
+    def count_runnable(self, states: Optional[Collection[PipelineState]] = None) -> int:
+        now = datetime.now(timezone.utc)
+        return sum(
+            1 for job_id in self._queue
+            if (job := self._jobs.get(job_id)) is not None
+            and is_claimable(job, now)
+            and (states is None or job.current_state in states)
+        )
+
+    def publish_worker_stats(self, process_id: str, stats: Dict[str, Any]) -> None:
+        self._worker_stats[process_id] = (time.monotonic(), stats)
+
+    def clear_worker_stats(self, process_id: str) -> None:
+        self._worker_stats.pop(process_id, None)
+
+    def worker_stats(self, max_age: float = WORKER_STATS_TTL_SECONDS) -> List[Dict[str, Any]]:
+        cutoff = time.monotonic() - max_age
+        return [
+            stats for published_at, stats in list(self._worker_stats.values())
+            if published_at >= cutoff
+        ]
 
     def list(self) -> Iterable[str]:
         return list(self._jobs.keys())
@@ -0,0 +1,503 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import mutagen
+
+from core.config import Config
+from infra.sqlite_connection import get_database
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = {".mp3", ".m4a", ".mp4", ".opus", ".ogg", ".flac"}
+
+# Unverified archive (see handle_archiving): never a duplicate match
+EXCLUDED_DIRS = {"_Unidentified"}
+
+# Bumped whenever normalize_title / normalize_artist change: stored
+# lookup keys are then re-derived from the stored tags on startup
+KEY_VERSION = 2
+
+# Sampled content hash: size + head + tail (a full read of a large
+# library would dominate the scan)
+HASH_SAMPLE_BYTES = 64 * 1024
+
+# Columns added after the first release of the table, and backfilled by
+# the next scan (rows without size/mtime always read as changed)
+TRACK_COLUMNS = {
+    "size": "INTEGER",
+    "mtime": "REAL",
+    "title": "TEXT",
+    "artist": "TEXT",
+    "album": "TEXT",
+    "duration": "REAL",
+    "content_hash": "TEXT",
+}
+
+_FEAT_RE = re.compile(r"[\(\[]?\s*\b(feat|ft|featuring)\b\.?.*$", re.IGNORECASE)
+# Collaboration separators. " x " only in lower case and between words,
+# so artists named "X", "X Ambassadors" or "Malcolm X" are not split
+_ARTIST_SPLIT_RE = re.compile(r"\s*[,&]\s*|\s+(?:(?-i:x)|and)\s+", re.IGNORECASE)
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def _key(text: str) -> str:
+    return " ".join(_PUNCT_RE.sub(" ", text.casefold()).split())
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lookup key for a track title: case-, punctuation- and
+    whitespace-insensitive, with any "feat. ..." suffix dropped.
+    """
+    return _key(_FEAT_RE.sub("", title or ""))
+
+
+def normalize_artist(artist: str) -> str:
+    """
+    Lookup key for an artist credit: the primary artist only, so
+    "A, B" / "A & B" / "A x B" / "A feat. B" all match "A".
+
+    Never shortens a name to nothing: if stripping the credits leaves
+    an empty key, the whole name is used instead.
+    """
+    artist = artist or ""
+    credit = _FEAT_RE.sub("", artist)
+    primary = _ARTIST_SPLIT_RE.split(credit, maxsplit=1)[0]
+
+    for candidate in (primary, credit, artist):
+        key = _key(candidate)
+        if key:
+            return key
+    return ""
+
+
+def first_tag(tags, key: str) -> Optional[str]:
+    """First value of an (easy) mutagen tag as a string, or None."""
+    value = tags.get(key) if tags else None
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return str(value) if value else None
+
+
+def content_hash(path: str, size: int) -> str:
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_SAMPLE_BYTES))
+        if size > 2 * HASH_SAMPLE_BYTES:
+            f.seek(-HASH_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def read_track(path: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+    """
+    Tags, duration and content hash of one library file.
+    Falls back to the "{title} - {artist}" file name when untagged.
+    """
+    title = artist = album = None
+    duration = None
+
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception as e:
+        logger.debug(f"Unreadable tags in {path}: {e}")
+        audio = None
+
+    if audio is not None:
+        title = first_tag(audio.tags, "title")
+        artist = first_tag(audio.tags, "artist")
+        album = first_tag(audio.tags, "album")
+        duration = getattr(audio.info, "length", None)
+
+    if not title or not artist:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if " - " in stem:
+            name_title, name_artist = stem.rsplit(" - ", 1)
+        else:
+            name_title, name_artist = stem, ""
+        title = title or name_title
+        artist = artist or name_artist
+
+    try:
+        digest = content_hash(path, size)
+    except OSError as e:
+        logger.debug(f"Cannot hash {path}: {e}")
+        return None
+
+    return {
+        "path": path,
+        "title_key": normalize_title(title),
+        "artist_key": normalize_artist(artist),
+        "size": size,
+        "mtime": mtime,
+        "title": title,
+        "artist": artist,
+        "album": album,
+        "duration": duration,
+        "content_hash": digest,
+    }
+
+
+_UPSERT_SQL = """
+    INSERT INTO library_tracks (
+        path, title_key, artist_key, video_id, indexed_at,
+        size, mtime, title, artist, album, duration, content_hash
+    )
+    VALUES (
+        :path, :title_key, :artist_key, :video_id, :indexed_at,
+        :size, :mtime, :title, :artist, :album, :duration, :content_hash
+    )
+    ON CONFLICT(path) DO UPDATE SET
+        title_key = excluded.title_key,
+        artist_key = excluded.artist_key,
+        video_id = COALESCE(excluded.video_id, library_tracks.video_id),
+        indexed_at = excluded.indexed_at,
+        size = excluded.size,
+        mtime = excluded.mtime,
+        title = excluded.title,
+        artist = excluded.artist,
+        album = excluded.album,
+        duration = excluded.duration,
+        content_hash = excluded.content_hash
+"""
+
+_SUMMARY_COLUMNS = "path, title, artist, album, duration, size, mtime, content_hash, video_id"
+
+
+class LibraryIndex:
+    """
+    Persistent index of the music library.
+
+    Per file: path, size, mtime, title/artist/album tags, duration,
+    a sampled content hash, and the YouTube video_id for files this
+    app stored. Lookups go through normalized (title, primary artist)
+    keys or the video_id.
+
+    - the first scan reads every file on a thread pool
+    - later scans only stat the tree, and re-read tags for files whose
+      size or mtime changed; vanished files are dropped
+    - rows whose file has disappeared are also dropped when a lookup
+      hits them
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self._db = get_database(db_path)
+        self._scan_lock = threading.Lock()
+        self._scanned_roots: set = set()
+        self._last_scan: Optional[Dict[str, Any]] = None
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._db.connect() as conn:
+            # Processes migrate one at a time (see SQLiteJobStore._init_db)
+            conn.execute("BEGIN IMMEDIATE")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS library_tracks (
+                    path TEXT PRIMARY KEY,
+                    title_key TEXT NOT NULL,
+                    artist_key TEXT NOT NULL,
+                    video_id TEXT,
+                    indexed_at REAL NOT NULL
+                )
+            """)
+            existing = {
+                row[1] for row in conn.execute("PRAGMA table_info(library_tracks)")
+            }
+            for name, sql_type in TRACK_COLUMNS.items():
+                if name not in existing:
+                    try:
+                        conn.execute(f"ALTER TABLE library_tracks ADD COLUMN {name} {sql_type}")
+                    except sqlite3.OperationalError as e:
+                        if "duplicate column" not in str(e).lower():
+                            raise
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS library_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            row = conn.execute(
+                "SELECT value FROM library_meta WHERE key = 'key_version'"
+            ).fetchone()
+            if not row or int(row[0]) < KEY_VERSION:
+                self._rekey(conn)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_library_title_artist
+                ON library_tracks(title_key, artist_key)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_library_video_id
+                ON library_tracks(video_id)
+                WHERE video_id IS NOT NULL
+            """)
+            conn.commit()
+
+    def _rekey(self, conn: sqlite3.Connection) -> None:
+        # Rows without tags (older schema) are re-read by the next scan
+        rows = conn.execute(
+            """
+            SELECT path, title, artist
+            FROM library_tracks
+            WHERE title IS NOT NULL AND artist IS NOT NULL
+            """
+        ).fetchall()
+
+        conn.executemany(
+            "UPDATE library_tracks SET title_key = ?, artist_key = ? WHERE path = ?",
+            [(normalize_title(title), normalize_artist(artist), path) for path, title, artist in rows],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO library_meta (key, value) VALUES ('key_version', ?)",
+            (str(KEY_VERSION),),
+        )
+
+    # -------------------------------------------------
+    # Writes
+    # -------------------------------------------------
+
+    def add(self, path: Union[str, Path], title: str, artist: str, video_id: Optional[str] = None) -> None:
+        """
+        Index a file the pipeline just stored (keys come from its metadata).
+        """
+        path = str(path)
+        st = os.stat(path)
+
+        row = read_track(path, st.st_size, st.st_mtime) or {
+            "path": path, "size": st.st_size, "mtime": st.st_mtime,
+            "title": title, "artist": artist, "album": None,
+            "duration": None, "content_hash": None,
+        }
+        row.update(
+            title_key=normalize_title(title),
+            artist_key=normalize_artist(artist),
+            video_id=video_id,
+            indexed_at=time.time(),
+        )
+
+        with self._db.connect() as conn:
+            conn.execute(_UPSERT_SQL, row)
+            conn.commit()
+
+    def move(self, old_path: Union[str, Path], new_path: Union[str, Path]) -> None:
+        """Follow a rename (row keys, tags and video_id are unchanged)."""
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE library_tracks SET path = ? WHERE path = ?",
+                (str(new_path), str(old_path)),
+            )
+            conn.commit()
+
+    def remove(self, path: Union[str, Path]) -> None:
+        with self._db.connect() as conn:
+            conn.execute("DELETE FROM library_tracks WHERE path = ?", (str(path),))
+            conn.commit()
+
+    def scan(self, root: Path, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bring the index for `root` up to date (recursive, incremental).
+        Returns scan statistics.
+        """
+        started = time.perf_counter()
+        root = os.path.abspath(str(root))
+        lower, upper = root + os.sep, root + chr(ord(os.sep) + 1)
+
+        with self._db.connect() as conn:
+            known = {
+                path: (size, mtime)
+                for path, size, mtime in conn.execute(
+                    "SELECT path, size, mtime FROM library_tracks WHERE path >= ? AND path < ?",
+                    (lower, upper),
+                )
+            }
+
+        seen = set()
+        changed = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [
+                d for d in dirnames
+                if d not in EXCLUDED_DIRS and not d.startswith(".")
+            ]
+
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() not in AUDIO_EXTENSIONS:
+                    continue
+
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+
+                seen.add(path)
+                if known.get(path) != (st.st_size, st.st_mtime):
+                    changed.append((path, st.st_size, st.st_mtime))
+
+        # Tag parsing and hashing are I/O bound: fan out
+        with ThreadPoolExecutor(
+            max_workers=workers or Config.LIBRARY_SCAN_WORKERS,
+            thread_name_prefix="truetrack-library-scan",
+        ) as pool:
+            rows = [row for row in pool.map(lambda args: read_track(*args), changed) if row]
+
+        now = time.time()
+        for row in rows:
+            row.update(video_id=None, indexed_at=now)
+
+        removed = [(path,) for path in known.keys() - seen]
+
+        with self._db.connect() as conn:
+            conn.executemany(_UPSERT_SQL, rows)
+            conn.executemany("DELETE FROM library_tracks WHERE path = ?", removed)
+            conn.commit()
+
+        stats = {
+            "root": root,
+            "files": len(seen),
+            "updated": len(rows),
+            "removed": len(removed),
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": now,
+        }
+        self._last_scan = stats
+
+        logger.info(
+            f"Library index: {stats['files']} files in {root} "
+            f"({stats['updated']} updated, {stats['removed']} removed, {stats['seconds']}s)"
+        )
+        return stats
+
+    def ensure_scanned(self, root: Path) -> None:
+        """
+        Scan `root` once per process, so files that predate the index
+        (or were copied in by hand) are known.
+        """
+        key = os.path.abspath(str(root))
+        with self._scan_lock:
+            if key in self._scanned_roots:
+                return
+            self.scan(root)
+            self._scanned_roots.add(key)
+
+    def scan_in_background(self, root: Path) -> None:
+        """
+        Start `ensure_scanned(root)` on a daemon thread, unless `root`
+        was already scanned or a scan is running. Never blocks.
+        """
+        key = os.path.abspath(str(root))
+        if key in self._scanned_roots or self._scan_lock.locked():
+            return
+
+        threading.Thread(
+            target=self._background_scan,
+            args=(root,),
+            name="truetrack-library-scan",
+            daemon=True,
+        ).start()
+
+    def _background_scan(self, root: Path) -> None:
+        try:
+            self.ensure_scanned(root)
+        except Exception as e:
+            logger.warning(f"Library scan failed: {e}")
+
+    def rescan(self, root: Path) -> Dict[str, Any]:
+        with self._scan_lock:
+            stats = self.scan(root)
+            self._scanned_roots.add(os.path.abspath(str(root)))
+            return stats
+
+    # -------------------------------------------------
+    # Lookups
+    # -------------------------------------------------
+
+    def find(self, title: str, artists: Iterable[str], video_id: Optional[str] = None) -> Optional[str]:
+        """
+        Path of an existing library file for this track, or None.
+        """
+        candidates = []
+
+        try:
+            with self._db.connect() as conn:
+                if video_id:
+                    candidates += [
+                        row[0] for row in conn.execute(
+                            "SELECT path FROM library_tracks WHERE video_id = ?",
+                            (video_id,),
+                        )
+                    ]
+
+                title_key = normalize_title(title)
+                for artist in artists:
+                    candidates += [
+                        row[0] for row in conn.execute(
+                            "SELECT path FROM library_tracks WHERE title_key = ? AND artist_key = ?",
+                            (title_key, normalize_artist(artist)),
+                        )
+                    ]
+        except sqlite3.Error as e:
+            logger.warning(f"Library index lookup failed: {e}")
+            return None
+
+        for path in candidates:
+            if os.path.exists(path):
+                return path
+            self.remove(path)
+
+        return None
+
+    def search(self, query: str = "", limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Library tracks whose title or artist contains `query` (normalized).
+        """
+        pattern = f"%{normalize_title(query)}%"
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {_SUMMARY_COLUMNS} FROM library_tracks
+                WHERE title_key LIKE ? OR artist_key LIKE ?
+                ORDER BY artist_key, title_key
+                LIMIT ?
+                """,
+                (pattern, pattern, limit),
+            ).fetchall()
+
+        names = [name.strip() for name in _SUMMARY_COLUMNS.split(",")]
+        return [dict(zip(names, row)) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db.connect() as conn:
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM library_tracks"
+            ).fetchone()
+
+        return {
+            "tracks": count,
+            "total_bytes": total_bytes,
+            "last_scan": self._last_scan,
+        }
+
+
+_index: Optional[LibraryIndex] = None
+_index_lock = threading.Lock()
+
+def get_library_index() -> LibraryIndex:
+    """
+    Return the process-wide library index.
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = LibraryIndex(Config.DB_PATH)
+        return _index
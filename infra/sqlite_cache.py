@@ -0,0 +1,183 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from infra.sqlite_connection import get_database
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for "not in cache" (None/[] are valid cached values)
+MISS = object()
+
+# Recency granularity for LRU eviction
+LRU_TOUCH_SECONDS = 60
+
+class SQLiteCache:
+    """
+    Persistent key/value cache with TTL and LRU eviction, stored
+    alongside the jobs in the application database.
+
+    - one `namespace` per cached service (rows share one table)
+    - values are JSON; expired rows read as a miss
+    - at most `max_entries` rows per namespace: the least recently
+      read ones are evicted on write
+    - hit/miss counters are per process (see `stats()`)
+
+    Cache failures never propagate: a broken cache reads as a miss
+    and silently skips writes.
+    """
+
+    _schema_lock = threading.Lock()
+    _schema_ready: set = set()
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._db = get_database(db_path)
+
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._schema_lock:
+            if self._db.db_path in self._schema_ready:
+                return
+
+            with self._db.connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_cache_lru
+                    ON cache_entries(namespace, accessed_at)
+                """)
+                conn.commit()
+
+            self._schema_ready.add(self._db.db_path)
+
+    def get(self, key: str) -> Any:
+        """
+        Cached value for `key`, or MISS.
+        """
+        now = time.time()
+
+        try:
+            with self._db.connect() as conn:
+                row = conn.execute(
+                    """
+                    SELECT value, accessed_at FROM cache_entries
+                    WHERE namespace = ? AND key = ? AND expires_at > ?
+                    """,
+                    (self.namespace, key, now),
+                ).fetchone()
+
+                # Hits stay read-only unless the LRU stamp is stale
+                if row is not None and now - row[1] > LRU_TOUCH_SECONDS:
+                    conn.execute(
+                        "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, self.namespace, key),
+                    )
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache read failed ({self.namespace}): {e}")
+            row = None
+
+        with self._stats_lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        return MISS if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        try:
+            with self._db.connect() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO cache_entries (namespace, key, value, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET
+                        value = excluded.value,
+                        expires_at = excluded.expires_at,
+                        accessed_at = excluded.accessed_at
+                    """,
+                    (self.namespace, key, json.dumps(value), now + ttl, now),
+                )
+
+                # LRU bound: expired rows first, then the least recently read
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                    (self.namespace, now),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM cache_entries
+                    WHERE namespace = ? AND key IN (
+                        SELECT key FROM cache_entries
+                        WHERE namespace = ?
+                        ORDER BY accessed_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed ({self.namespace}): {e}")
+            return
+
+        with self._stats_lock:
+            self._writes += 1
+
+    def clear(self) -> None:
+        with self._db.connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._db.connect() as conn:
+                entries = conn.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                    (self.namespace,),
+                ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "writes": self._writes,
+            }
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Union
+
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+class SQLiteDatabase:
+    """
+    Shared connection layer for a single SQLite file.
+
+    Properties:
+    - one persistent connection per thread (sqlite3 objects are not shared)
+    - WAL journal: readers never block the writer and vice versa
+    - synchronous=NORMAL: durable at checkpoints, far fewer fsyncs
+    - busy timeout instead of immediate "database is locked"
+    - prepared statements reused via the per-connection statement cache
+    - fork-safe: a child process never reuses its parent's connection
+
+    Usage mirrors `sqlite3.connect(...)` as a context manager:
+
+        with db.connect() as conn:
+            conn.execute(...)
+
+    The block commits on success and rolls back on error,
+    but the connection itself stays open for the next call.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        pid = getattr(self._local, "pid", None)
+
+        if conn is not None and pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        """Close the calling thread's connection, if any."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+        self._local.pid = None
+
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_path: Union[str, Path]) -> SQLiteDatabase:
+    """
+    Return the process-wide SQLiteDatabase for `db_path`.
+
+    The job store and AppConfig point at the same file, so they
+    share one connection per thread instead of opening their own.
+    """
+    key = os.path.abspath(str(db_path))
+
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = SQLiteDatabase(key)
+            _databases[key] = db
+        return db
@@ -1,21 +1,117 @@
 import sqlite3
 import json
-from typing import Optional, Iterable, List
-from datetime import datetime, timezone
-
-from infra.job_store import JobStore
-from core.job import Job
+import base64
+from typing import Optional, Iterable, List, Dict, Any, Tuple, Collection, Callable
+from datetime import datetime, timedelta, timezone
+
+from infra.job_store import JobStore, LeaseLostError, LOCK_TTL_SECONDS, WORKER_STATS_TTL_SECONDS
+from infra.sqlite_connection import get_database
+from infra.job_notifier import JobNotifier
+from core.job import Job, ensure_utc
 from core.states import PipelineState
 from pathlib import Path
 
-LOCK_TTL_SECONDS = 60
+TERMINAL_STATES = (
+    PipelineState.FINALIZED,
+    PipelineState.FAILED,
+    PipelineState.CANCELLED,
+)
+
+# Columns mirrored out of the JSON payload at write time.
+# - scheduling: the worker finds runnable jobs without deserializing history
+# - summary: the jobs page is served without hydrating full Jobs
+# Order matters: it matches `_mirrored_values`.
+MIRRORED_COLUMNS = {
+    "current_state": "TEXT",
+    "next_run_at": "TEXT",
+    "locked_at": "TEXT",
+    "title": "TEXT",
+    "artist": "TEXT",
+    "created_at": "TEXT",
+    "resume_from": "TEXT",
+    "priority": "INTEGER",
+}
+
+def _ts(dt: Optional[datetime]) -> Optional[str]:
+    """
+    Canonical, fixed-width UTC timestamp for indexed columns.
+
+    Fixed width keeps lexical order == chronological order in SQL.
+    """
+    if dt is None:
+        return None
+    return ensure_utc(dt).astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+# SQL mirror of `is_runnable`. Parameters: (now, lock_expiry_cutoff).
+RUNNABLE_WHERE = """
+    current_state NOT IN ('FINALIZED', 'FAILED', 'CANCELLED')
+    AND current_state NOT LIKE 'USER\\_%' ESCAPE '\\'
+    AND (next_run_at IS NULL OR next_run_at <= ?)
+    AND (locked_at IS NULL OR locked_at <= ?)
+"""
+
+def _summary_title_artist(job: Job) -> tuple:
+    if job.final_metadata:
+        return (
+            job.final_metadata.get("trackName"),
+            job.final_metadata.get("artistName"),
+        )
+
+    if job.result:
+        return job.result.title, job.result.artist
+
+    return None, None
+
+def job_priority(job: Job) -> int:
+    """Interactive (--ask) jobs are claimed before bulk ones."""
+    return 1 if job.options.ask else 0
+
+def _mirrored_values(job: Job) -> tuple:
+    return (
+        job.current_state.name,
+        _ts(job.next_run_at),
+        _ts(job.locked_at),
+        *_summary_title_artist(job),
+        _ts(job.created_at),
+        job.resume_from.name if job.resume_from else None,
+        job_priority(job),
+    )
+
+def _state_filter(states: Optional[Collection[PipelineState]]) -> Tuple[str, list]:
+    """SQL fragment (appended to a WHERE) restricting current_state."""
+    if states is None:
+        return "", []
+    names = [state.name for state in states]
+    if not names:
+        return "AND 0", []
+    return f"AND current_state IN ({', '.join('?' for _ in names)})", names
+
+def _add_column(conn: sqlite3.Connection, name: str, sql_type: str) -> None:
+    """ALTER TABLE jobs ADD COLUMN; a column that already exists is fine."""
+    try:
+        conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+    except sqlite3.OperationalError as e:
+        if "duplicate column" not in str(e).lower():
+            raise
+
+_MIRRORED_NAMES = ", ".join(MIRRORED_COLUMNS)
+_MIRRORED_PLACEHOLDERS = ", ".join("?" for _ in MIRRORED_COLUMNS)
+_MIRRORED_ASSIGNMENTS = ", ".join(f"{name} = ?" for name in MIRRORED_COLUMNS)
+
+def encode_cursor(updated_at: str, job_id: str) -> str:
+    raw = f"{updated_at}|{job_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        updated_at, job_id = raw.split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    return updated_at, job_id
 
 def is_runnable(job: Job) -> bool:
-    if job.current_state in (
-        PipelineState.FINALIZED,
-        PipelineState.FAILED,
-        PipelineState.CANCELLED,
-    ):
+    if job.current_state in TERMINAL_STATES:
         return False
 
     if job.current_state.name.startswith("USER_"):
@@ -39,8 +135,9 @@ class SQLiteJobStore(JobStore):
     - shared across processes
     - crash-safe
     - resumable
-    - supports job locking
+    - supports job locking (leases with heartbeats and fencing tokens)
     - supports idempotency
+    - persistent per-thread WAL connections (see infra.sqlite_connection)
     """
 
     def __init__(self, db_path: str = "jobs.db"):
@@ -49,11 +146,20 @@ class SQLiteJobStore(JobStore):
         # Ensure parent directory exists
         db_file = Path(self.db_path)
         db_file.parent.mkdir(parents=True, exist_ok=True)
-        
+
+        # Processes sharing this DB file also share a notification channel
+        super().__init__(JobNotifier(channel=self.db_path))
+
+        self._db = get_database(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
+            # Serializes schema setup across processes: the write lock is
+            # held before the schema is inspected, and every change below
+            # commits (or rolls back) as one transaction.
+            conn.execute("BEGIN IMMEDIATE")
+
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS jobs (
                     job_id TEXT PRIMARY KEY,
@@ -62,6 +168,8 @@ class SQLiteJobStore(JobStore):
                 )
             """)
 
+            self._migrate_mirrored_columns(conn)
+
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS idempotency_keys (
                     key TEXT PRIMARY KEY,
@@ -70,82 +178,351 @@ class SQLiteJobStore(JobStore):
                 )
             """)
 
+            # Latest pool/bandwidth snapshot of each worker process
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS worker_stats (
+                    process_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+
             conn.commit()
 
+    def _migrate_mirrored_columns(self, conn: sqlite3.Connection) -> None:
+        """
+        Add and backfill the columns mirrored out of the payload.
+
+        Safe to run on every startup:
+        - columns are only added when missing
+        - every row whose mirror was never written is backfilled, so a
+          migration interrupted after its ALTERs is completed next time
+        """
+        existing = {
+            row[1] for row in conn.execute("PRAGMA table_info(jobs)")
+        }
+
+        for name, sql_type in MIRRORED_COLUMNS.items():
+            if name not in existing:
+                _add_column(conn, name, sql_type)
+
+        # Fencing token: owned by claim/sweep, never mirrored from the payload
+        if "lease_token" not in existing:
+            _add_column(conn, "lease_token", "INTEGER NOT NULL DEFAULT 0")
+
+        # current_state and priority are never NULL once mirrored
+        rows = conn.execute(
+            "SELECT job_id, data FROM jobs WHERE current_state IS NULL OR priority IS NULL"
+        ).fetchall()
+
+        for job_id, raw in rows:
+            job = Job.from_dict(json.loads(raw))
+            conn.execute(
+                f"""
+                UPDATE jobs
+                SET {_MIRRORED_ASSIGNMENTS}
+                WHERE job_id = ?
+                """,
+                (*_mirrored_values(job), job_id),
+            )
+
+        # Runnable candidates only: terminal history never enters this index,
+        # so scheduling cost stays flat as finished jobs accumulate.
+        # Key order matches the claim order: priority, then oldest first.
+        conn.execute("DROP INDEX IF EXISTS idx_jobs_runnable")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_runnable_priority
+            ON jobs (priority DESC, updated_at)
+            WHERE current_state NOT IN ('FINALIZED', 'FAILED', 'CANCELLED')
+        """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_updated
+            ON jobs (current_state, updated_at)
+        """)
+
+        # Keyset pagination for the jobs page: (updated_at, job_id)
+        conn.execute("DROP INDEX IF EXISTS idx_jobs_updated_at")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_recent
+            ON jobs (updated_at, job_id)
+        """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_next_run_at
+            ON jobs (next_run_at)
+        """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_locked_at
+            ON jobs (locked_at)
+        """)
+
     def create(self, job: Job) -> None:
         payload = json.dumps(job.to_dict())
-        now = datetime.now(timezone.utc).isoformat()
+        now = _ts(datetime.now(timezone.utc))
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             try:
                 conn.execute(
-                    """
-                    INSERT INTO jobs (job_id, data, updated_at)
-                    VALUES (?, ?, ?)
+                    f"""
+                    INSERT INTO jobs (
+                        job_id, data, updated_at, {_MIRRORED_NAMES}
+                    )
+                    VALUES (?, ?, ?, {_MIRRORED_PLACEHOLDERS})
                     """,
-                    (job.job_id, payload, now),
+                    (job.job_id, payload, now, *_mirrored_values(job)),
                 )
                 conn.commit()
             except sqlite3.IntegrityError:
                 raise ValueError(f"Job {job.job_id} already exists")
 
+        job.mark_clean()
+        self.notify_work(job)
+
     def get(self, job_id: str) -> Optional[Job]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             row = conn.execute(
-                "SELECT data FROM jobs WHERE job_id = ?",
+                "SELECT data, lease_token FROM jobs WHERE job_id = ?",
                 (job_id,),
             ).fetchone()
 
         if not row:
             return None
 
-        return Job.from_dict(json.loads(row[0]))
+        return self._hydrate(row[0], row[1])
+
+    def _hydrate(self, raw: str, lease_token: int = 0) -> Job:
+        job = Job.from_dict(json.loads(raw))
+        job.lease_token = lease_token
+        job.mark_clean()
+        return job
 
-    def update(self, job: Job) -> None:
+    def update(self, job: Job, fenced: bool = False) -> None:
         payload = json.dumps(job.to_dict())
-        now = datetime.now(timezone.utc).isoformat()
+        now = _ts(datetime.now(timezone.utc))
+
+        fence = "AND lease_token = ?" if fenced else ""
+        fence_params = (job.lease_token,) if fenced else ()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             cur = conn.execute(
-                """
+                f"""
                 UPDATE jobs
-                SET data = ?, updated_at = ?
-                WHERE job_id = ?
+                SET data = ?, updated_at = ?, {_MIRRORED_ASSIGNMENTS}
+                WHERE job_id = ? {fence}
                 """,
-                (payload, now, job.job_id),
+                (payload, now, *_mirrored_values(job), job.job_id, *fence_params),
             )
 
             if cur.rowcount == 0:
+                exists = conn.execute(
+                    "SELECT 1 FROM jobs WHERE job_id = ?",
+                    (job.job_id,),
+                ).fetchone()
+
+                if exists:
+                    raise LeaseLostError(job.job_id, job.lease_token)
                 raise KeyError(f"Job {job.job_id} does not exist")
 
             conn.commit()
 
+        job.mark_clean()
+        self.notify_work(job)
+
     def next_runnable(self) -> Optional[str]:
         """
         Return the job_id of the next runnable job.
 
         Ordering:
-        - oldest updated first (fairness)
+        - interactive jobs first (see `job_priority`)
+        - then oldest updated first (fairness)
+
+        Mirrors `is_runnable` in SQL over the indexed scheduling
+        columns; the JSON payload is never read.
+        """
+        now = datetime.now(timezone.utc)
+
+        with self._db.connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT job_id
+                FROM jobs
+                WHERE {RUNNABLE_WHERE}
+                ORDER BY priority DESC, updated_at ASC
+                LIMIT 1
+                """,
+                (
+                    _ts(now),
+                    _ts(now - timedelta(seconds=LOCK_TTL_SECONDS)),
+                ),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def claim_next(
+        self,
+        worker_id: str,
+        ttl: int = LOCK_TTL_SECONDS,
+        states: Optional[Collection[PipelineState]] = None,
+    ) -> Optional[Job]:
+        """
+        Atomically select the next runnable job and lock it.
+
+        A single UPDATE ... RETURNING statement: SQLite serializes
+        writers, so two workers can never claim the same job.
+        The lock is written to both the indexed column and the payload,
+        and the job's fencing token is bumped (see `update(fenced=True)`).
         """
+        now = datetime.now(timezone.utc)
+        now_ts = _ts(now)
+        state_filter, state_params = _state_filter(states)
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
+            row = conn.execute(
+                f"""
+                UPDATE jobs
+                SET locked_at = ?,
+                    updated_at = ?,
+                    lease_token = lease_token + 1,
+                    data = json_set(
+                        data,
+                        '$.locked_at', ?,
+                        '$.locked_by', ?,
+                        '$.updated_at', ?
+                    )
+                WHERE job_id = (
+                    SELECT job_id
+                    FROM jobs
+                    WHERE {RUNNABLE_WHERE} {state_filter}
+                    ORDER BY priority DESC, updated_at ASC
+                    LIMIT 1
+                )
+                RETURNING data, lease_token
+                """,
+                (
+                    now_ts, now_ts,
+                    now_ts, worker_id, now_ts,
+                    now_ts, _ts(now - timedelta(seconds=ttl)),
+                    *state_params,
+                ),
+            ).fetchone()
+            conn.commit()
+
+        if not row:
+            return None
+
+        return self._hydrate(row[0], row[1])
+
+    def renew_lease(self, job_id: str, lease_token: int) -> bool:
+        """
+        Heartbeat. Only extends a lease that is still held under
+        `lease_token`; a released lock is never re-taken.
+        """
+        now_ts = _ts(datetime.now(timezone.utc))
+
+        with self._db.connect() as conn:
+            cur = conn.execute(
+                """
+                UPDATE jobs
+                SET locked_at = ?,
+                    data = json_set(data, '$.locked_at', ?)
+                WHERE job_id = ?
+                  AND lease_token = ?
+                  AND locked_at IS NOT NULL
+                """,
+                (now_ts, now_ts, job_id, lease_token),
+            )
+            conn.commit()
+
+        return cur.rowcount == 1
+
+    def release_orphaned_leases(self, is_orphaned: Callable[[str], bool]) -> int:
+        """
+        Unlock jobs whose lock owner is dead and fence that owner out.
+        """
+        with self._db.connect() as conn:
             rows = conn.execute(
                 """
-                SELECT job_id, data
+                SELECT job_id, json_extract(data, '$.locked_by'), lease_token
                 FROM jobs
-                ORDER BY updated_at ASC
+                WHERE locked_at IS NOT NULL
                 """
             ).fetchall()
 
-        for job_id, raw in rows:
-            job = Job.from_dict(json.loads(raw))
-            if is_runnable(job):
-                return job_id
+            released = 0
+            for job_id, locked_by, lease_token in rows:
+                if not locked_by or not is_orphaned(locked_by):
+                    continue
 
-        return None
+                cur = conn.execute(
+                    """
+                    UPDATE jobs
+                    SET locked_at = NULL,
+                        lease_token = lease_token + 1,
+                        data = json_set(data, '$.locked_at', NULL, '$.locked_by', NULL)
+                    WHERE job_id = ? AND lease_token = ?
+                    """,
+                    (job_id, lease_token),
+                )
+                released += cur.rowcount
+
+            conn.commit()
+
+        if released:
+            self.notify_work()
+
+        return released
+
+    def count_runnable(self, states: Optional[Collection[PipelineState]] = None) -> int:
+        now = datetime.now(timezone.utc)
+        state_filter, state_params = _state_filter(states)
+
+        with self._db.connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT COUNT(*)
+                FROM jobs
+                WHERE {RUNNABLE_WHERE} {state_filter}
+                """,
+                (
+                    _ts(now),
+                    _ts(now - timedelta(seconds=LOCK_TTL_SECONDS)),
+                    *state_params,
+                ),
+            ).fetchone()
+
+        return row[0]
+
+    def next_wakeup_at(self, ttl: int = LOCK_TTL_SECONDS) -> Optional[datetime]:
+        """
+        Earliest pending retry or lock expiry among non-terminal jobs.
+        """
+        now = datetime.now(timezone.utc)
+
+        with self._db.connect() as conn:
+            retry_at, oldest_lock = conn.execute(
+                """
+                SELECT
+                    MIN(CASE WHEN next_run_at > ? THEN next_run_at END),
+                    MIN(CASE WHEN locked_at > ? THEN locked_at END)
+                FROM jobs
+                WHERE current_state NOT IN ('FINALIZED', 'FAILED', 'CANCELLED')
+                  AND current_state NOT LIKE 'USER\\_%' ESCAPE '\\'
+                """,
+                (_ts(now), _ts(now - timedelta(seconds=ttl))),
+            ).fetchone()
+
+        candidates = []
+        if retry_at:
+            candidates.append(datetime.fromisoformat(retry_at))
+        if oldest_lock:
+            candidates.append(datetime.fromisoformat(oldest_lock) + timedelta(seconds=ttl))
+
+        return min(candidates) if candidates else None
 
     def list(self) -> Iterable[str]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             rows = conn.execute(
                 "SELECT job_id FROM jobs"
             ).fetchall()
@@ -153,7 +530,7 @@ class SQLiteJobStore(JobStore):
         return [row[0] for row in rows]
 
     def get_job_by_idempotency_key(self, key: str) -> Optional[Job]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             row = conn.execute(
                 "SELECT job_id FROM idempotency_keys WHERE key = ?",
                 (key,),
@@ -167,7 +544,7 @@ class SQLiteJobStore(JobStore):
     def bind_idempotency_key(self, key: str, job_id: str) -> None:
         now = datetime.now(timezone.utc).isoformat()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.connect() as conn:
             conn.execute(
                 """
                 INSERT OR IGNORE INTO idempotency_keys (key, job_id, created_at)
@@ -177,9 +554,50 @@ class SQLiteJobStore(JobStore):
             )
             conn.commit()
             
+    def publish_worker_stats(self, process_id: str, stats: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+
+        with self._db.connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO worker_stats (process_id, data, updated_at)
+                VALUES (?, ?, ?)
+                """,
+                (process_id, json.dumps(stats), _ts(now)),
+            )
+            # Leftovers of processes that died without clearing theirs
+            conn.execute(
+                "DELETE FROM worker_stats WHERE updated_at < ?",
+                (_ts(now - timedelta(seconds=WORKER_STATS_TTL_SECONDS)),),
+            )
+            conn.commit()
+
+    def clear_worker_stats(self, process_id: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "DELETE FROM worker_stats WHERE process_id = ?",
+                (process_id,),
+            )
+            conn.commit()
+
+    def worker_stats(self, max_age: float = WORKER_STATS_TTL_SECONDS) -> List[Dict[str, Any]]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT data
+                FROM worker_stats
+                WHERE updated_at >= ?
+                ORDER BY process_id
+                """,
+                (_ts(cutoff),),
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
     def list_jobs(self, limit: int = 50) -> List[Job]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._db.connect() as conn:
             rows = conn.execute(
                 """
                 SELECT data
@@ -190,9 +608,71 @@ class SQLiteJobStore(JobStore):
                 (limit,),
             ).fetchall()
     
-        jobs = []
-        for row in rows:
-            job_dict = json.loads(row["data"])
-            jobs.append(Job.from_dict(job_dict))
-    
-        return jobs
\ No newline at end of file
+        return [self._hydrate(row[0]) for row in rows]
+
+    def list_job_summaries(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        states: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first job summaries, read from the mirrored columns only.
+
+        Keyset pagination on (updated_at, job_id):
+        - `cursor` is the opaque value returned by the previous page
+        - returns (summaries, next_cursor); next_cursor is None on the last page
+
+        `states` optionally restricts to the given PipelineState names.
+        """
+        clauses = []
+        params: List[Any] = []
+
+        if cursor:
+            updated_at, job_id = decode_cursor(cursor)
+            clauses.append("(updated_at, job_id) < (?, ?)")
+            params.extend([updated_at, job_id])
+
+        if states is not None:
+            states = list(states)
+            if not states:
+                return [], None
+            clauses.append(
+                f"current_state IN ({', '.join('?' for _ in states)})"
+            )
+            params.extend(states)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT job_id, updated_at, current_state,
+                       title, artist, created_at, resume_from
+                FROM jobs
+                {where}
+                ORDER BY updated_at DESC, job_id DESC
+                LIMIT ?
+                """,
+                (*params, limit + 1),
+            ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+        summaries = [
+            {
+                "job_id": job_id,
+                "updated_at": updated_at,
+                "current_state": current_state,
+                "title": title,
+                "artist": artist,
+                "created_at": created_at,
+                "resume_from": resume_from,
+            }
+            for job_id, updated_at, current_state, title, artist, created_at, resume_from in rows
+        ]
+
+        return summaries, next_cursor
@@ -102,6 +102,9 @@ switch ($Command) {
             }
         }
 
+        # The standalone worker below runs the pipeline, not the API process
+        $env:TRUETRACK_EMBEDDED_WORKER = "0"
+
         # 5. Launch
         
         # Backend
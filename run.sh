@@ -89,7 +89,9 @@ case "$COMMAND" in
 
         # 5. Launch Components
         export TRUETRACK_SKIP_FRONTEND=1
-        
+        # The standalone worker below runs the pipeline, not the API process
+        export TRUETRACK_EMBEDDED_WORKER=0
+
         # Backend
         nohup python3 app.py >> "$API_LOG" 2>&1 &
         echo $! > "$API_PID_FILE"
@@ -142,6 +144,21 @@ case "$COMMAND" in
         "$SCRIPT_DIR/.venv/bin/python3" -m cli.doctor "${@:2}"
         ;;
 
+    migrate-layout)
+        if [[ ! -d ".venv" ]]; then
+            echo "Error: Virtual environment not found in $SCRIPT_DIR"
+            exit 1
+        fi
+
+        if [[ -f ".env" ]]; then
+            set -a
+            source ".env"
+            set +a
+        fi
+
+        "$SCRIPT_DIR/.venv/bin/python3" -m cli.migrate_layout "${@:2}"
+        ;;
+
     stop)
         echo "Stopping TrueTrack..."
         STOPPED=0
@@ -212,6 +229,7 @@ case "$COMMAND" in
         echo "  stop    Stop all TrueTrack processes"
         echo "  status  Show process status and Web UI URL"
         echo "  doctor  Check system health and fix dependencies"
+        echo "  migrate-layout  Reorganize the library into the configured layout (--dry-run to preview)"
         echo "  help    Show this help message"
         echo ""
         echo "Environment Variables (optional):"
@@ -222,7 +240,7 @@ case "$COMMAND" in
         ;;
 
     *)
-        echo "Usage: $0 {start|stop|status|doctor|help}"
+        echo "Usage: $0 {start|stop|status|doctor|migrate-layout|help}"
         exit 1
         ;;
 esac
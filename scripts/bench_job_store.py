@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: connection-per-call vs persistent WAL connections.
+
+Usage:
+    python scripts/bench_job_store.py [--jobs 500] [--ops 5000]
+
+"before" replays the legacy access pattern (sqlite3.connect per call,
+rollback journal); "after" goes through SQLiteJobStore and the shared
+connection layer. Both run against fresh temp databases.
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from core.job import Job
+from infra.sqlite_job_store import SQLiteJobStore
+
+
+def _rate(n: int, seconds: float) -> str:
+    return f"{n / seconds:>10.0f} ops/s"
+
+
+def bench_before(db_path: str, jobs: list, ops: int) -> dict:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO jobs VALUES (?, ?, ?)",
+            [(j.job_id, json.dumps(j.to_dict()), j.updated_at.isoformat()) for j in jobs],
+        )
+        conn.commit()
+
+    ids = [j.job_id for j in jobs]
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        with sqlite3.connect(db_path) as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (random.choice(ids),)).fetchone()
+        Job.from_dict(json.loads(row[0]))
+    results["get"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        job = random.choice(jobs)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET data = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(job.to_dict()), datetime.now(timezone.utc).isoformat(), job.job_id),
+            )
+            conn.commit()
+    results["update"] = time.perf_counter() - start
+
+    return results
+
+
+def bench_after(db_path: str, jobs: list, ops: int) -> dict:
+    store = SQLiteJobStore(db_path)
+    for job in jobs:
+        store.create(job)
+
+    ids = [j.job_id for j in jobs]
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        store.get(random.choice(ids))
+    results["get"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        store.update(random.choice(jobs))
+    results["update"] = time.perf_counter() - start
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JobStore connection benchmark")
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--ops", type=int, default=5000)
+    args = parser.parse_args()
+
+    jobs = [Job(raw_query=f"track {i}", normalized_query=f"track {i}") for i in range(args.jobs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_before(os.path.join(tmp, "before.db"), jobs, args.ops)
+        after = bench_after(os.path.join(tmp, "after.db"), jobs, args.ops)
+
+    print(f"{'op':<8} {'before':>14} {'after':>14} {'speedup':>8}")
+    for op in ("get", "update"):
+        print(
+            f"{op:<8} {_rate(args.ops, before[op])} {_rate(args.ops, after[op])} "
+            f"{before[op] / after[op]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# core.config requires a database path at import time; tests that touch
+# the database pass their own (see the `store` fixtures)
+os.environ.setdefault(
+    "TRUETRACK_DB_PATH",
+    str(Path(tempfile.mkdtemp(prefix="truetrack-tests-")) / "truetrack.db"),
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import create_app
+from core.config import Config
+from core.job import Job
+from core.states import PipelineState
+from infra.sqlite_job_store import SQLiteJobStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDED_WORKER", False)
+    with TestClient(create_app(host="127.0.0.1", port=8000)) as client:
+        yield client
+
+
+@pytest.fixture
+def store():
+    return SQLiteJobStore(str(Config.DB_PATH))
+
+
+@pytest.mark.parametrize("state, status", [
+    (PipelineState.FAILED, "error"),
+    (PipelineState.CANCELLED, "cancelled"),
+    (PipelineState.FINALIZED, "success"),
+    (PipelineState.USER_INTENT_SELECTION, "waiting"),
+    (PipelineState.DOWNLOADING, "running"),
+])
+def test_list_and_detail_report_the_same_status(client, store, state, status):
+    job = Job(raw_query=f"query {state.name}")
+    job.current_state = state
+    store.create(job)
+
+    rows = client.get("/api/jobs", params={"status": status, "limit": 200}).json()
+    row = next(r for r in rows if r["job_id"] == job.job_id)
+
+    assert row["status"] == status
+    assert client.get(f"/api/jobs/{job.job_id}").json()["status"] == status
+
+
+def test_unknown_status_filter_is_rejected(client):
+    assert client.get("/api/jobs", params={"status": "failed"}).status_code == 400
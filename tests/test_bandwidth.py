@@ -0,0 +1,94 @@
+from core.config import Config
+from worker.bandwidth import BandwidthScheduler
+
+
+def rates(*leases):
+    return [lease.rate_limit for lease in leases]
+
+
+def test_unlimited_budget_sets_no_rate_limit():
+    scheduler = BandwidthScheduler(0, 4)
+
+    lease = scheduler.acquire("a", interactive=False)
+
+    assert lease.rate_limit is None
+
+
+def test_single_download_gets_the_whole_budget():
+    scheduler = BandwidthScheduler(1000, 4)
+
+    lease = scheduler.acquire("a", interactive=False)
+
+    assert lease.rate_limit == 1000
+
+
+def test_bulk_downloads_share_equally():
+    scheduler = BandwidthScheduler(900, 4)
+
+    leases = [scheduler.acquire(job_id, interactive=False) for job_id in "abc"]
+
+    assert rates(*leases) == [300, 300, 300]
+
+
+def test_interactive_downloads_get_a_weighted_share():
+    scheduler = BandwidthScheduler(1000, 4)
+    weight = Config.INTERACTIVE_BANDWIDTH_WEIGHT
+
+    bulk = scheduler.acquire("bulk", interactive=False)
+    interactive = scheduler.acquire("interactive", interactive=True)
+
+    assert bulk.rate_limit == 1000 // (weight + 1)
+    assert interactive.rate_limit == 1000 * weight // (weight + 1)
+
+
+def test_shares_are_rebalanced_when_a_download_ends():
+    scheduler = BandwidthScheduler(1000, 4)
+    a = scheduler.acquire("a", interactive=False)
+    b = scheduler.acquire("b", interactive=False)
+    assert rates(a, b) == [500, 500]
+
+    with b:
+        pass
+
+    assert a.rate_limit == 1000
+    assert scheduler.stats()["active"] == 1
+
+
+def test_bound_params_follow_the_share():
+    scheduler = BandwidthScheduler(1000, 4)
+    a = scheduler.acquire("a", interactive=False)
+    params = {}
+    a.bind(params)
+    assert params["ratelimit"] == 1000
+
+    scheduler.acquire("b", interactive=False)
+
+    assert params["ratelimit"] == 500
+
+
+def test_bulk_downloads_split_fragment_concurrency():
+    scheduler = BandwidthScheduler(0, 4)
+
+    first = scheduler.acquire("a", interactive=False)
+    second = scheduler.acquire("b", interactive=False)
+    interactive = scheduler.acquire("c", interactive=True)
+
+    assert first.fragments == 4
+    assert second.fragments == 2
+    assert interactive.fragments == 4
+
+
+def test_stats_report_per_job_throughput():
+    scheduler = BandwidthScheduler(1000, 4)
+    lease = scheduler.acquire("a", interactive=True)
+
+    lease.report(500, 250.0, total=1000, eta=2)
+
+    stats = scheduler.stats()
+    assert stats["budget"] == 1000
+    assert stats["speed"] == 250.0
+    [download] = stats["downloads"]
+    assert download["job_id"] == "a"
+    assert download["downloaded_bytes"] == 500
+    assert download["total_bytes"] == 1000
+    assert download["interactive"] is True
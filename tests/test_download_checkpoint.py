@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from utils.download_checkpoint import MANIFEST_NAME, DownloadCheckpoint, file_sha256
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    checkpoint = DownloadCheckpoint(tmp_path, "abc123", "bestaudio")
+    checkpoint.prepare()
+    return checkpoint
+
+
+def write(checkpoint, name, data=b"audio"):
+    path = checkpoint.path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_checkpoint_dir_is_keyed_by_video_id_and_format(tmp_path):
+    a = DownloadCheckpoint(tmp_path, "abc123", "bestaudio")
+    b = DownloadCheckpoint(tmp_path, "abc123", "stream-mp3_320")
+    c = DownloadCheckpoint(tmp_path, "xyz789", "bestaudio")
+
+    assert len({a.path, b.path, c.path}) == 3
+    assert all(p.parent == tmp_path for p in (a.path, b.path, c.path))
+
+
+def test_nothing_is_complete_before_commit(checkpoint):
+    write(checkpoint, "Song.webm")
+
+    assert checkpoint.completed() is None
+
+
+def test_commit_records_size_and_hash(checkpoint):
+    path = write(checkpoint, "Song.webm")
+
+    checkpoint.commit(path)
+
+    manifest = json.loads((checkpoint.path / MANIFEST_NAME).read_text())
+    assert manifest["file"] == "Song.webm"
+    assert manifest["size"] == len(b"audio")
+    assert manifest["sha256"] == file_sha256(path)
+    assert checkpoint.completed() == path
+
+
+def test_modified_file_fails_validation(checkpoint):
+    path = write(checkpoint, "Song.webm")
+    checkpoint.commit(path)
+
+    path.write_bytes(b"AUDIO")  # same size, different content
+
+    assert checkpoint.completed() is None
+
+
+def test_truncated_or_missing_file_fails_validation(checkpoint):
+    path = write(checkpoint, "Song.webm")
+    checkpoint.commit(path)
+
+    path.write_bytes(b"aud")
+    assert checkpoint.completed() is None
+
+    path.unlink()
+    assert checkpoint.completed() is None
+
+
+def test_manifest_for_another_source_is_ignored(tmp_path, checkpoint):
+    path = write(checkpoint, "Song.webm")
+    checkpoint.commit(path)
+
+    other = DownloadCheckpoint(tmp_path, "abc123", "bestaudio")
+    other.video_id = "zzz"
+
+    assert other.completed() is None
+
+
+def test_corrupt_manifest_fails_validation(checkpoint):
+    path = write(checkpoint, "Song.webm")
+    checkpoint.commit(path)
+
+    (checkpoint.path / MANIFEST_NAME).write_text("{not json")
+
+    assert checkpoint.completed() is None
+
+
+def test_outputs_skip_partial_files_and_the_manifest(checkpoint):
+    write(checkpoint, "Song.webm.part")
+    write(checkpoint, "Song.webm.ytdl")
+    done = write(checkpoint, "Song.webm")
+    checkpoint.commit(done)
+
+    assert checkpoint.outputs() == [done]
+
+
+def test_discard_removes_the_checkpoint(checkpoint):
+    path = write(checkpoint, "Song.webm")
+    checkpoint.commit(path)
+
+    checkpoint.discard()
+
+    assert not checkpoint.path.exists()
+    assert checkpoint.completed() is None
+    assert checkpoint.outputs() == []
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.job import Job, JobOptions
+from core.states import PipelineState
+from infra.job_store import InMemoryJobStore, JobUnitOfWork
+
+
+@pytest.fixture
+def store():
+    return InMemoryJobStore()
+
+
+def make_job(store, job_id, state=PipelineState.INIT, **options):
+    job = Job(job_id=job_id, options=JobOptions(**options))
+    job.current_state = state
+    store.create(job)
+    return job
+
+
+def test_a_claimed_job_is_not_claimed_again(store):
+    make_job(store, "a")
+
+    assert store.claim_next("w1").job_id == "a"
+    assert store.claim_next("w2") is None
+
+
+def test_a_checkpointed_job_stays_leased(store):
+    make_job(store, "a")
+    job = store.claim_next("w1")
+
+    # run-until-pause: persist a step while keeping the lock
+    job.current_state = PipelineState.SEARCHING
+    JobUnitOfWork(store, job).checkpoint()
+
+    assert store.claim_next("w2") is None
+
+
+def test_a_released_job_can_be_claimed_again(store):
+    make_job(store, "a")
+    job = store.claim_next("w1")
+
+    job.current_state = PipelineState.SEARCHING
+    with JobUnitOfWork(store, job):
+        pass
+
+    again = store.claim_next("w2")
+    assert again.job_id == "a"
+    assert again.lease_token == 2
+
+
+def test_an_expired_lock_can_be_claimed(store):
+    make_job(store, "a")
+    store.claim_next("w1", ttl=60)
+
+    assert store.claim_next("w2", ttl=0).job_id == "a"
+
+
+def test_delayed_retries_are_not_claimed_early(store):
+    job = make_job(store, "a")
+    job.next_run_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    store.update(job)
+
+    assert store.claim_next("w") is None
+    assert store.count_runnable() == 0
+
+    job.next_run_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    store.update(job)
+
+    assert store.claim_next("w").job_id == "a"
+
+
+def test_updates_do_not_queue_a_job_twice(store):
+    job = make_job(store, "a")
+    for _ in range(3):
+        store.update(job)
+
+    assert store.count_runnable() == 1
+    assert store.claim_next("w1").job_id == "a"
+    assert store.claim_next("w2") is None
+
+
+@pytest.mark.parametrize("state", [
+    PipelineState.FINALIZED,
+    PipelineState.FAILED,
+    PipelineState.CANCELLED,
+    PipelineState.USER_INTENT_SELECTION,
+])
+def test_terminal_and_paused_jobs_are_not_claimed(store, state):
+    make_job(store, "a", state=state)
+
+    assert store.claim_next("w") is None
+
+
+def test_claim_prefers_interactive_jobs_and_filters_by_state(store):
+    make_job(store, "bulk")
+    make_job(store, "interactive", ask=True)
+    make_job(store, "downloading", state=PipelineState.DOWNLOADING)
+
+    assert store.claim_next("w", states={PipelineState.DOWNLOADING}).job_id == "downloading"
+    assert store.claim_next("w").job_id == "interactive"
+    assert store.claim_next("w").job_id == "bulk"
+
@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import multiprocessing
+
+import pytest
+
+from infra.library_index import LibraryIndex, normalize_artist
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LibraryIndex(tmp_path / "library.db")
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "library"
+    root.mkdir()
+    return root
+
+
+def track(root, name, data=b"not really audio"):
+    # Untagged files are indexed by their "{title} - {artist}" name
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def test_first_scan_indexes_every_audio_file(index, root):
+    song = track(root, "Song - Artist.mp3")
+    track(root, "Album/Other - Band.m4a")
+    track(root, "cover.jpg")
+
+    stats = index.scan(root)
+
+    assert stats["files"] == 2
+    assert stats["updated"] == 2
+    assert index.find("Song", ["Artist"]) == str(song)
+    assert index.find("other", ["Band feat. Someone"]) == str(root / "Album/Other - Band.m4a")
+
+
+def test_unchanged_files_are_not_reread(index, root):
+    track(root, "Song - Artist.mp3")
+    index.scan(root)
+
+    stats = index.scan(root)
+
+    assert stats == {**stats, "files": 1, "updated": 0, "removed": 0}
+
+
+def test_changed_files_are_reread(index, root):
+    song = track(root, "Song - Artist.mp3")
+    index.scan(root)
+
+    song.write_bytes(b"longer, re-encoded content")
+    os.utime(song, (1, 1))
+
+    stats = index.scan(root)
+
+    assert stats["updated"] == 1
+    [row] = index.search("song")
+    assert row["size"] == song.stat().st_size
+
+
+def test_new_and_vanished_files_are_picked_up(index, root):
+    old = track(root, "Old - Artist.mp3")
+    index.scan(root)
+
+    old.unlink()
+    new = track(root, "New - Artist.mp3")
+    stats = index.scan(root)
+
+    assert (stats["updated"], stats["removed"]) == (1, 1)
+    assert index.find("Old", ["Artist"]) is None
+    assert index.find("New", ["Artist"]) == str(new)
+
+
+def test_archive_and_hidden_dirs_are_skipped(index, root):
+    track(root, "_Unidentified/Song - Artist.mp3")
+    track(root, ".truetrack-staging/job/Song - Artist.mp3")
+
+    stats = index.scan(root)
+
+    assert stats["files"] == 0
+    assert index.find("Song", ["Artist"]) is None
+
+
+def test_scan_leaves_other_roots_alone(index, tmp_path):
+    first = tmp_path / "first"
+    second = tmp_path / "first-but-not-really"
+    track(first, "A - X.mp3")
+    track(second, "B - Y.mp3")
+    index.scan(first)
+    index.scan(second)
+
+    stats = index.scan(first)
+
+    assert stats["removed"] == 0
+    assert index.find("B", ["Y"]) is not None
+
+
+def test_find_drops_rows_for_deleted_files(index, root):
+    song = track(root, "Song - Artist.mp3")
+    index.scan(root)
+
+    song.unlink()
+
+    assert index.find("Song", ["Artist"]) is None
+    assert index.stats()["tracks"] == 0
+
+
+def test_find_matches_by_video_id(index, root):
+    song = track(root, "Renamed by hand.mp3")
+    index.add(song, "Song", "Artist", video_id="abc123")
+
+    assert index.find("Something else", ["Nobody"], video_id="abc123") == str(song)
+
+
+def test_ensure_scanned_runs_once_per_root(index, root):
+    index.ensure_scanned(root)
+    track(root, "Song - Artist.mp3")
+
+    index.ensure_scanned(root)
+    assert index.find("Song", ["Artist"]) is None
+
+    index.rescan(root)
+    assert index.find("Song", ["Artist"]) is not None
+
+
+def _open_index(path, barrier):
+    barrier.wait()
+    LibraryIndex(path)
+
+
+def test_concurrent_first_open_does_not_fail(tmp_path):
+    path = tmp_path / "fresh.db"
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(4)
+    procs = [ctx.Process(target=_open_index, args=(path, barrier)) for _ in range(4)]
+
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=30)
+
+    assert [proc.exitcode for proc in procs] == [0, 0, 0, 0]
+
+
+# -------------------------------------------------
+# Lookup keys
+# -------------------------------------------------
+
+@pytest.mark.parametrize("artist, key", [
+    ("A, B", "a"),
+    ("A & B", "a"),
+    ("A x B", "a"),
+    ("A feat. B", "a"),
+    ("X", "x"),
+    ("X Ambassadors", "x ambassadors"),
+    ("Malcolm X", "malcolm x"),
+    ("Malcolm x", "malcolm x"),
+    ("&ME", "me"),
+])
+def test_normalize_artist(artist, key):
+    assert normalize_artist(artist) == key
+
+
+def test_an_artist_named_x_only_matches_itself(index, root):
+    track(root, "Renegades - X Ambassadors.mp3")
+    track(root, "Untitled.mp3")
+    index.scan(root)
+
+    assert index.find("Renegades", ["X"]) is None
+    assert index.find("Untitled", ["X"]) is None
+    assert index.find("Renegades", ["X Ambassadors"]) is not None
+
+
+def test_keys_from_an_older_normalization_are_rebuilt(tmp_path, root):
+    song = track(root, "Renegades - X Ambassadors.mp3")
+    db_path = tmp_path / "library.db"
+    LibraryIndex(db_path).scan(root)
+
+    # As written before " x " splitting was fixed
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE library_tracks SET artist_key = ''")
+    conn.execute("DELETE FROM library_meta")
+    conn.commit()
+    conn.close()
+
+    assert LibraryIndex(db_path).find("Renegades", ["X Ambassadors"]) == str(song)
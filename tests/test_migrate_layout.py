@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from cli.migrate_layout import plan_moves, read_fields
+from core.pipeline import _tag_mp3
+from utils.storage import layout_fields, render_layout
+
+LAYOUT = "{albumartist}/{album}/{track:02} {title}"
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+def write_mp3(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(MP3_FRAME * 10)
+    return path
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "library"
+    root.mkdir()
+    return root
+
+
+def test_tags_written_by_the_pipeline_render_the_same_path(root):
+    meta = {
+        "trackName": "Song",
+        "artistName": "Singer feat. Guest",
+        "collectionName": "Album",
+        "collectionArtistName": "Singer",
+        "trackNumber": 3,
+        "discNumber": 2,
+        "releaseDate": "2001-05-01T00:00:00Z",
+    }
+    path = write_mp3(root / "Song - Singer feat. Guest.mp3")
+    _tag_mp3(str(path), meta, None)
+
+    stored = render_layout(LAYOUT + " {disc}", layout_fields(
+        meta["trackName"],
+        meta["artistName"],
+        album=meta["collectionName"],
+        albumartist=meta["collectionArtistName"],
+        track=meta["trackNumber"],
+        disc=meta["discNumber"],
+        year=meta["releaseDate"],
+    ), ".mp3")
+
+    assert render_layout(LAYOUT + " {disc}", read_fields(path), ".mp3") == stored
+    assert stored == Path("Singer/Album/03 Song 2.mp3")
+
+
+def test_files_are_found_at_any_depth(root):
+    write_mp3(root / "Song - Singer.mp3")
+    write_mp3(root / "Old" / "Layout" / "Other - Band.mp3")
+
+    targets = {target.relative_to(root) for _, target in plan_moves(root, "{artist}/{title}")}
+
+    assert targets == {Path("Singer/Song.mp3"), Path("Band/Other.mp3")}
+
+
+def test_archive_and_hidden_dirs_are_left_alone(root):
+    write_mp3(root / "_Unidentified" / "Song - Singer.mp3")
+    write_mp3(root / ".truetrack-staging" / "job" / "Song - Singer.mp3")
+
+    assert plan_moves(root, "{artist}/{title}") == []
+
+
+def test_placed_files_and_numbered_collisions_are_not_moved(root):
+    meta = {"trackName": "Song", "artistName": "Singer", "collectionName": "Album"}
+    for name in ("Song.mp3", "Song (2).mp3", "Song (live).mp3"):
+        _tag_mp3(str(write_mp3(root / "Singer" / name)), meta, None)
+
+    moves = plan_moves(root, "{artist}/{title}")
+
+    assert [source.name for source, _ in moves] == ["Song (live).mp3"]
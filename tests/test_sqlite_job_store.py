@@ -0,0 +1,263 @@
+import json
+import sqlite3
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.job import Job, JobOptions
+from core.states import PipelineState
+from infra.job_store import LeaseLostError
+from infra.sqlite_job_store import MIRRORED_COLUMNS, SQLiteJobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def make_job(store, job_id, state=PipelineState.INIT, **options):
+    job = Job(job_id=job_id, options=JobOptions(**options))
+    job.current_state = state
+    store.create(job)
+    return job
+
+
+# -------------------------------------------------
+# claim_next
+# -------------------------------------------------
+
+def test_claim_locks_the_job_and_bumps_its_lease_token(store):
+    make_job(store, "a")
+
+    job = store.claim_next("w1")
+
+    assert job.job_id == "a"
+    assert job.locked_by == "w1"
+    assert job.lease_token == 1
+    assert store.get("a").locked_at is not None
+
+
+def test_a_claimed_job_is_not_claimed_again(store):
+    make_job(store, "a")
+
+    assert store.claim_next("w1").job_id == "a"
+    assert store.claim_next("w2") is None
+
+
+def test_claim_takes_the_oldest_job_first(store):
+    make_job(store, "first")
+    make_job(store, "second")
+
+    assert store.claim_next("w").job_id == "first"
+    assert store.claim_next("w").job_id == "second"
+
+
+def test_claim_prefers_interactive_jobs(store):
+    make_job(store, "bulk")
+    make_job(store, "interactive", ask=True)
+
+    assert store.claim_next("w").job_id == "interactive"
+    assert store.claim_next("w").job_id == "bulk"
+
+
+def test_claim_filters_by_state(store):
+    make_job(store, "init")
+    make_job(store, "downloading", state=PipelineState.DOWNLOADING)
+
+    job = store.claim_next("w", states={PipelineState.DOWNLOADING})
+
+    assert job.job_id == "downloading"
+    assert store.claim_next("w", states={PipelineState.DOWNLOADING}) is None
+
+
+@pytest.mark.parametrize("state", [
+    PipelineState.FINALIZED,
+    PipelineState.FAILED,
+    PipelineState.CANCELLED,
+    PipelineState.USER_INTENT_SELECTION,
+])
+def test_terminal_and_paused_jobs_are_not_claimed(store, state):
+    make_job(store, "a", state=state)
+
+    assert store.claim_next("w") is None
+
+
+def test_delayed_retries_are_not_claimed_early(store):
+    job = make_job(store, "a")
+    job.next_run_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    store.update(job)
+
+    assert store.claim_next("w") is None
+
+
+def test_an_expired_lock_can_be_claimed(store):
+    make_job(store, "a")
+    store.claim_next("w1", ttl=60)
+
+    assert store.claim_next("w2", ttl=0).job_id == "a"
+
+
+# -------------------------------------------------
+# Leases: fencing, heartbeats, orphan sweep
+# -------------------------------------------------
+
+def test_fenced_write_under_the_current_lease_succeeds(store):
+    make_job(store, "a")
+    job = store.claim_next("w1")
+
+    job.current_state = PipelineState.RESOLVING_IDENTITY
+    store.update(job, fenced=True)
+
+    assert store.get("a").current_state == PipelineState.RESOLVING_IDENTITY
+
+
+def test_fenced_write_from_a_superseded_lease_is_rejected(store):
+    make_job(store, "a")
+    stale = store.claim_next("w1", ttl=60)
+    fresh = store.claim_next("w2", ttl=0)  # w1's lock expired
+
+    stale.current_state = PipelineState.FAILED
+    with pytest.raises(LeaseLostError):
+        store.update(stale, fenced=True)
+
+    fresh.current_state = PipelineState.RESOLVING_IDENTITY
+    store.update(fresh, fenced=True)
+    assert store.get("a").current_state == PipelineState.RESOLVING_IDENTITY
+
+
+def test_fenced_write_to_a_missing_job_raises_key_error(store):
+    with pytest.raises(KeyError):
+        store.update(Job(job_id="missing"), fenced=True)
+
+
+def test_renew_lease_extends_the_current_lease(store):
+    make_job(store, "a")
+    job = store.claim_next("w1")
+    before = store.get("a").locked_at
+
+    assert store.renew_lease("a", job.lease_token)
+    assert store.get("a").locked_at >= before
+
+
+def test_renew_lease_fails_for_a_superseded_token(store):
+    make_job(store, "a")
+    stale = store.claim_next("w1", ttl=60)
+    store.claim_next("w2", ttl=0)
+
+    assert not store.renew_lease("a", stale.lease_token)
+
+
+def test_renew_lease_never_retakes_a_released_lock(store):
+    make_job(store, "a")
+    job = store.claim_next("w1")
+    job.release_lock()
+    store.update(job, fenced=True)
+
+    assert not store.renew_lease("a", job.lease_token)
+    assert store.get("a").locked_at is None
+
+
+def test_orphaned_leases_are_released_and_fenced(store):
+    make_job(store, "dead")
+    make_job(store, "alive")
+    dead = store.claim_next("host/1/0")
+    store.claim_next("host/2/0")
+
+    released = store.release_orphaned_leases(lambda worker_id: worker_id == "host/1/0")
+
+    assert released == 1
+    assert store.get("dead").locked_at is None
+    assert store.get("alive").locked_at is not None
+
+    # The dead owner's late write is fenced out; the job is claimable again
+    with pytest.raises(LeaseLostError):
+        store.update(dead, fenced=True)
+    assert store.claim_next("w").job_id == "dead"
+
+
+# -------------------------------------------------
+# Worker stats
+# -------------------------------------------------
+
+def test_worker_stats_keep_the_latest_snapshot_per_process(store):
+    store.publish_worker_stats("host/1", {"process_id": "host/1", "n": 1})
+    store.publish_worker_stats("host/2", {"process_id": "host/2", "n": 1})
+    store.publish_worker_stats("host/1", {"process_id": "host/1", "n": 2})
+
+    assert store.worker_stats() == [
+        {"process_id": "host/1", "n": 2},
+        {"process_id": "host/2", "n": 1},
+    ]
+
+
+def test_cleared_and_stale_worker_stats_are_not_reported(store):
+    store.publish_worker_stats("host/1", {"process_id": "host/1"})
+    store.publish_worker_stats("host/2", {"process_id": "host/2"})
+
+    store.clear_worker_stats("host/1")
+
+    assert [s["process_id"] for s in store.worker_stats()] == ["host/2"]
+    assert store.worker_stats(max_age=0) == []
+
+
+# -------------------------------------------------
+# Schema migration of pre-existing databases
+# -------------------------------------------------
+
+def legacy_db(path, *jobs, add_columns=False):
+    """A jobs table from before the mirrored columns (optionally ALTERed, not backfilled)."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at TEXT NOT NULL)")
+    for job in jobs:
+        conn.execute(
+            "INSERT INTO jobs VALUES (?, ?, ?)",
+            (job.job_id, json.dumps(job.to_dict()), job.updated_at.isoformat()),
+        )
+    if add_columns:
+        for name, sql_type in MIRRORED_COLUMNS.items():
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+    conn.commit()
+    conn.close()
+
+
+def test_pre_existing_database_is_migrated_and_backfilled(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    done = Job(job_id="done")
+    done.current_state = PipelineState.FINALIZED
+    legacy_db(path, Job(job_id="pending", options=JobOptions(ask=True)), done)
+
+    store = SQLiteJobStore(path)
+
+    assert store.claim_next("w").job_id == "pending"
+    assert store.claim_next("w") is None
+    assert store.get("done").current_state == PipelineState.FINALIZED
+
+
+def test_interrupted_migration_is_completed_on_next_start(tmp_path):
+    # Columns added by a previous start that died before the backfill
+    path = str(tmp_path / "interrupted.db")
+    legacy_db(path, Job(job_id="stranded"), add_columns=True)
+
+    store = SQLiteJobStore(path)
+
+    assert store.claim_next("w").job_id == "stranded"
+
+
+def _open_store(path, barrier):
+    barrier.wait()
+    SQLiteJobStore(path)
+
+
+def test_concurrent_first_start_does_not_fail(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(4)
+    procs = [ctx.Process(target=_open_store, args=(path, barrier)) for _ in range(4)]
+
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=30)
+
+    assert [proc.exitcode for proc in procs] == [0, 0, 0, 0]
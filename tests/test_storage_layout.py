@@ -0,0 +1,165 @@
+import os
+import errno
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from utils.storage import (
+    FLAT_LAYOUT,
+    atomic_move,
+    layout_fields,
+    move_to_unique_path,
+    render_layout,
+    unique_path,
+    validate_layout,
+)
+
+
+# -------------------------------------------------
+# render_layout
+# -------------------------------------------------
+
+def test_flat_layout_matches_the_legacy_file_name():
+    fields = layout_fields("Song", "Artist")
+
+    assert render_layout(FLAT_LAYOUT, fields, ".mp3") == Path("Song - Artist.mp3")
+
+
+def test_nested_layout_with_format_spec():
+    fields = layout_fields("Song", "Artist", album="Album", albumartist="Band", track="3/12")
+
+    path = render_layout("{albumartist}/{album}/{track:02} {title}", fields, ".m4a")
+
+    assert path == Path("Band/Album/03 Song.m4a")
+
+
+def test_missing_tags_fall_back_to_placeholders():
+    fields = layout_fields("Song", "Artist")
+
+    path = render_layout("{albumartist}/{album}/{title}", fields, ".mp3")
+
+    assert path == Path("Artist/Unknown Album/Song.mp3")
+
+
+def test_separators_in_values_do_not_create_directories():
+    fields = layout_fields("AC/DC Live", "AC/DC", album="Back/In/Black")
+
+    path = render_layout("{artist}/{album}/{title}", fields, ".mp3")
+
+    assert path == Path("ACDC/BackInBlack/ACDC Live.mp3")
+
+
+def test_dot_segments_cannot_escape_the_library():
+    fields = layout_fields("..", "..", album="..")
+
+    path = render_layout("{artist}/{album}/{title}", fields, ".mp3")
+
+    assert ".." not in path.parts
+    assert not path.is_absolute()
+
+
+# -------------------------------------------------
+# validate_layout
+# -------------------------------------------------
+
+@pytest.mark.parametrize("template", [
+    FLAT_LAYOUT,
+    "{albumartist}/{album}/{track:02} {title}",
+    "{year}/{artist} - {title}",
+])
+def test_valid_layouts(template):
+    validate_layout(template)
+
+
+@pytest.mark.parametrize("template", [
+    "",
+    "   ",
+    "/abs/{title}",
+    "\\abs\\{title}",
+    "../{title}",
+    "{artist}/../{title}",
+    "{genre}/{title}",
+    "{title",
+])
+def test_invalid_layouts(template):
+    with pytest.raises(ValueError):
+        validate_layout(template)
+
+
+# -------------------------------------------------
+# unique_path
+# -------------------------------------------------
+
+def test_unique_path_returns_a_free_path_unchanged(tmp_path):
+    path = tmp_path / "Song.mp3"
+
+    assert unique_path(path) == path
+
+
+def test_unique_path_numbers_taken_paths(tmp_path):
+    (tmp_path / "Song.mp3").touch()
+    (tmp_path / "Song (2).mp3").touch()
+
+    assert unique_path(tmp_path / "Song.mp3") == tmp_path / "Song (3).mp3"
+
+
+
+# -------------------------------------------------
+# atomic_move / move_to_unique_path
+# -------------------------------------------------
+
+def test_move_without_replace_keeps_an_existing_file(tmp_path):
+    src = tmp_path / "src.mp3"
+    src.write_bytes(b"new")
+    dst = tmp_path / "dst.mp3"
+    dst.write_bytes(b"old")
+
+    with pytest.raises(FileExistsError):
+        atomic_move(src, dst, replace=False)
+
+    assert dst.read_bytes() == b"old"
+    assert src.read_bytes() == b"new"
+
+
+def test_move_without_replace_works_without_hard_links(tmp_path, monkeypatch):
+    def no_links(src, dst):
+        raise OSError(errno.EPERM, "Operation not permitted")
+    monkeypatch.setattr(os, "link", no_links)
+
+    src = tmp_path / "src.mp3"
+    src.write_bytes(b"new")
+    dst = tmp_path / "dst.mp3"
+
+    atomic_move(src, dst, replace=False)
+    assert dst.read_bytes() == b"new"
+    assert not src.exists()
+
+    src.write_bytes(b"newer")
+    with pytest.raises(FileExistsError):
+        atomic_move(src, dst, replace=False)
+    assert dst.read_bytes() == b"new"
+
+
+def test_concurrent_moves_to_one_name_never_overwrite(tmp_path):
+    sources = []
+    for i in range(16):
+        src = tmp_path / f"src{i}.mp3"
+        src.write_bytes(str(i).encode())
+        sources.append(src)
+
+    dst = tmp_path / "library" / "Title - Artist.mp3"
+    dst.parent.mkdir()
+
+    barrier = threading.Barrier(len(sources))
+
+    def move(src):
+        barrier.wait()
+        return move_to_unique_path(src, dst)
+
+    with ThreadPoolExecutor(len(sources)) as pool:
+        placed = list(pool.map(move, sources))
+
+    assert len(set(placed)) == len(sources)
+    assert sorted(p.read_bytes() for p in placed) == sorted(str(i).encode() for i in range(16))
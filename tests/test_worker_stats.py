@@ -0,0 +1,69 @@
+import pytest
+
+from core.config import Config
+from core.job import Job
+from core.states import PipelineState
+from infra.sqlite_job_store import SQLiteJobStore
+from worker.bandwidth import BandwidthScheduler
+from worker.pools import build_stage_pools
+from worker.runtime import collect_worker_stats
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def publish(store, process_id, download_slots, leases=()):
+    pools = build_stage_pools(download_slots)
+    scheduler = BandwidthScheduler(0, 4)
+    for job_id in leases:
+        scheduler.acquire(job_id, interactive=False).report(1024, 512.0)
+
+    store.publish_worker_stats(process_id, {
+        "process_id": process_id,
+        "updated_at": "2026-01-01T00:00:00+00:00",
+        "pools": [pool.stats(store) for pool in pools],
+        "bandwidth": scheduler.stats(),
+    })
+
+
+def test_no_worker_processes_report_nothing(store):
+    stats = collect_worker_stats(store)
+
+    assert stats["processes"] == []
+    assert stats["pools"] == []
+    assert stats["bandwidth"]["downloads"] == []
+
+
+def test_pools_and_downloads_are_combined_across_processes(store):
+    publish(store, "host/1", 2, leases=["a"])
+    publish(store, "host/2", 3, leases=["b", "c"])
+
+    stats = collect_worker_stats(store)
+
+    assert [p["process_id"] for p in stats["processes"]] == ["host/1", "host/2"]
+
+    download = next(p for p in stats["pools"] if p["name"] == "download")
+    assert download["limit"] == 5
+
+    bandwidth = stats["bandwidth"]
+    assert bandwidth["budget"] == (Config.DOWNLOAD_BANDWIDTH_BYTES or None)
+    assert bandwidth["active"] == 3
+    assert bandwidth["speed"] == 3 * 512.0
+    assert {(d["job_id"], d["process_id"]) for d in bandwidth["downloads"]} == {
+        ("a", "host/1"), ("b", "host/2"), ("c", "host/2"),
+    }
+
+
+def test_queue_depth_is_read_from_the_store(store):
+    publish(store, "host/1", 1)
+
+    job = Job(job_id="queued")
+    job.current_state = PipelineState.DOWNLOADING
+    store.create(job)
+
+    stats = collect_worker_stats(store)
+
+    download = next(p for p in stats["pools"] if p["name"] == "download")
+    assert download["queued"] == 1
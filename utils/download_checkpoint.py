@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from utils.storage import safe_filename
+
+MANIFEST_NAME = "manifest.json"
+
+# Left behind by yt-dlp / ffmpeg while a download is in flight
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".temp")
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadCheckpoint:
+    """
+    Resumable download workspace for one (video_id, format) pair.
+
+    - lives inside the job's temp dir and survives step retries and worker
+      restarts; partial files are resumed by yt-dlp instead of refetched
+    - a download only counts as done once `commit()` has written the
+      manifest (file name, size, sha256); anything else in the directory
+      is work in progress
+    - `completed()` re-validates size and hash, so a truncated or
+      modified file is never handed to the next step
+    """
+
+    def __init__(self, job_dir: Path, video_id: str, fmt: str):
+        self.video_id = video_id
+        self.format = fmt
+        self.path = job_dir / f"dl-{safe_filename(video_id)}-{safe_filename(fmt)}"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / MANIFEST_NAME
+
+    def prepare(self) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        return self.path
+
+    def completed(self) -> Optional[Path]:
+        """
+        The committed file, if its manifest is intact and it still matches.
+        """
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("video_id") != self.video_id or manifest.get("format") != self.format:
+            return None
+
+        path = self.path / manifest.get("file", "")
+        try:
+            if not path.is_file() or path.stat().st_size != manifest.get("size"):
+                return None
+            if file_sha256(path) != manifest.get("sha256"):
+                return None
+        except OSError:
+            return None
+
+        return path
+
+    def outputs(self) -> list[Path]:
+        """
+        Finished-looking files in the checkpoint, newest first.
+        """
+        if not self.path.exists():
+            return []
+
+        files = [
+            p for p in self.path.iterdir()
+            if p.is_file()
+            and p.name != MANIFEST_NAME
+            and not p.name.startswith(".")
+            and not p.name.endswith(PARTIAL_SUFFIXES)
+        ]
+        return sorted(files, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def commit(self, path: Path) -> None:
+        """
+        Record `path` as the completed download (atomic manifest write).
+        """
+        manifest = {
+            "video_id": self.video_id,
+            "format": self.format,
+            "file": path.name,
+            "size": path.stat().st_size,
+            "sha256": file_sha256(path),
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        partial = self.manifest_path.with_name(f".{MANIFEST_NAME}.part")
+        partial.write_text(json.dumps(manifest))
+        os.replace(partial, self.manifest_path)
+
+    def discard(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
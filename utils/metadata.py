@@ -1,20 +1,140 @@
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+
 from core.config import Config
+from infra.sqlite_cache import SQLiteCache, MISS
+
+logger = logging.getLogger(__name__)
 
 ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
 
+# Responses worth retrying: rate limiting and server-side failures
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ITunesClient:
+    """
+    iTunes Search API client.
+
+    - one pooled keep-alive requests.Session for the whole process
+    - up to Config.ITUNES_MAX_RETRIES retries with jittered exponential
+      backoff, on transient failures only (network errors, 429, 5xx)
+    - persistent response cache; empty results are cached too, for a
+      shorter TTL (negative caching)
+
+    Final failures raise requests.RequestException, as before.
+    """
+
+    def __init__(self):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(10, Config.POOL_NETWORK_SLOTS))
+        self._session.mount("https://", adapter)
+
+        self._cache = SQLiteCache(
+            Config.DB_PATH,
+            namespace="itunes_search",
+            ttl_seconds=Config.ITUNES_CACHE_TTL_SECONDS,
+            max_entries=Config.ITUNES_CACHE_MAX_ENTRIES,
+        )
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+
+    @staticmethod
+    def cache_key(term: str, artist: str, limit: int) -> str:
+        normalized = " ".join(f"{term} {artist}".casefold().split())
+        return f"{limit}:{normalized}"
+
+    def search(self, term: str, artist: str, limit: int = 5, bypass_cache: bool = False) -> List[Dict[str, Any]]:
+        key = self.cache_key(term, artist, limit)
+
+        if not bypass_cache:
+            cached = self._cache.get(key)
+            if cached is not MISS:
+                return cached
+
+        params = {
+            "term": f"{term} {artist}",
+            "entity": "song",
+            "limit": limit,
+        }
+        results = self._get(params).get("results", [])
+
+        ttl = None if results else Config.ITUNES_NEGATIVE_CACHE_TTL_SECONDS
+        self._cache.set(key, results, ttl_seconds=ttl)
+
+        return results
+
+    def _get(self, params: dict) -> dict:
+        attempt = 0
+
+        while True:
+            with self._stats_lock:
+                self._requests += 1
+
+            try:
+                resp = self._session.get(ITUNES_SEARCH_URL, params=params, timeout=Config.ITUNES_TIMEOUT)
+                if resp.status_code in TRANSIENT_STATUS_CODES:
+                    resp.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                if attempt >= Config.ITUNES_MAX_RETRIES:
+                    with self._stats_lock:
+                        self._failures += 1
+                    raise
+
+                delay = Config.ITUNES_BACKOFF_SECONDS * (2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+                attempt += 1
+
+                with self._stats_lock:
+                    self._retries += 1
+
+                logger.debug(f"iTunes lookup failed ({e}), retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            # Non-transient HTTP errors (4xx) are not retried
+            try:
+                resp.raise_for_status()
+            except requests.HTTPError:
+                with self._stats_lock:
+                    self._failures += 1
+                raise
+
+            return resp.json()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            client = {
+                "requests": self._requests,
+                "retries": self._retries,
+                "failures": self._failures,
+            }
+        return {**client, "cache": self._cache.stats()}
+
 
-def search_itunes(term: str, artist: str, limit: int = 5):
-    params = {
-        "term": f"{term} {artist}",
-        "entity": "song",
-        "limit": limit,
-    }
+_client: Optional[ITunesClient] = None
+_client_lock = threading.Lock()
 
-    resp = requests.get(ITUNES_SEARCH_URL, params=params, timeout=Config.ITUNES_TIMEOUT)
-    resp.raise_for_status()
+def get_itunes_client() -> ITunesClient:
+    """
+    Return the process-wide iTunes client.
+    """
+    global _client
 
-    data = resp.json()
-    return data.get("results", [])
+    with _client_lock:
+        if _client is None:
+            _client = ITunesClient()
+        return _client
 
 
+def search_itunes(term: str, artist: str, limit: int = 5, bypass_cache: bool = False):
+    return get_itunes_client().search(term, artist, limit=limit, bypass_cache=bypass_cache)
@@ -1,9 +1,27 @@
-import tempfile
 from pathlib import Path
 
-BASE_TEMP_DIR = Path(tempfile.gettempdir()) / "music_ingest"
+from core.config import Config
+
+# Default scratch root, relative to the music library (hidden: skipped by
+# the library index and most file managers)
+STAGING_DIR_NAME = ".truetrack-staging"
+
+def get_scratch_root() -> Path:
+    """
+    Root for per-job working files.
+
+    Defaults to a hidden staging directory inside the music library, so
+    moving a finished track into the library is a rename on the same
+    filesystem rather than a copy. TRUETRACK_SCRATCH_DIR overrides it.
+    """
+    if Config.ENV_SCRATCH_DIR:
+        return Path(Config.ENV_SCRATCH_DIR).expanduser()
+
+    # Imported here: AppConfig pulls in the database layer
+    from core.app_config import AppConfig
+    return AppConfig.get_music_library_root() / STAGING_DIR_NAME
 
 def ensure_job_temp_dir(job_id: str) -> Path:
-    path = BASE_TEMP_DIR / job_id
+    path = get_scratch_root() / job_id
     path.mkdir(parents=True, exist_ok=True)
     return path
@@ -1,11 +1,202 @@
+import os
+import errno
 import shutil
 from pathlib import Path
 
 def ensure_dir(path: Path):
     path.mkdir(parents=True, exist_ok=True)
 
+def _move_exclusive(src: Path, dst: Path) -> None:
+    """
+    Rename `src` to `dst`, raising FileExistsError if `dst` exists.
+    The existence check and the rename are one atomic step.
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno == errno.EXDEV:
+            raise
+
+        # No hard links here (FAT, some network shares): reserve the
+        # name with an exclusive create, then rename over the placeholder
+        os.close(os.open(dst, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        try:
+            os.replace(src, dst)
+        except BaseException:
+            dst.unlink(missing_ok=True)
+            raise
+        return
+
+    os.unlink(src)
+
+def atomic_move(src, dst, replace: bool = True) -> None:
+    """
+    Move `src` to `dst` so that `dst` is either absent or complete.
+
+    Same filesystem: one rename. Across filesystems: copy next to
+    `dst` under a hidden temporary name, then rename it into place,
+    so a crash never leaves a half-written file at `dst`.
+
+    replace=False: raise FileExistsError instead of overwriting an
+    existing `dst`, so concurrent movers to one path cannot clobber
+    each other.
+    """
+    src, dst = Path(src), Path(dst)
+    move = os.replace if replace else _move_exclusive
+
+    try:
+        move(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    partial = dst.with_name(f".{dst.name}.partial")
+    try:
+        shutil.copy2(src, partial)
+        move(partial, dst)
+    except BaseException:
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+        raise
+
+    src.unlink()
+
+def same_device(a: Path, b: Path) -> bool:
+    """
+    True if `a` and `b` (or their nearest existing parents) share a filesystem.
+    """
+    def existing(path: Path) -> Path:
+        path = path.resolve()
+        while not path.exists() and path != path.parent:
+            path = path.parent
+        return path
+
+    return os.stat(existing(a)).st_dev == os.stat(existing(b)).st_dev
+
 def safe_filename(name: str) -> str:
     forbidden = '<>:"/\\|?*'
     for ch in forbidden:
         name = name.replace(ch, "")
     return name.strip()
+
+# Layout of the pre-template library: "{title} - {artist}.ext" in the root
+FLAT_LAYOUT = "{title} - {artist}"
+
+_SAMPLE_FIELDS = {
+    "title": "Title",
+    "artist": "Artist",
+    "albumartist": "Album Artist",
+    "album": "Album",
+    "track": 1,
+    "disc": 1,
+    "year": "2000",
+}
+
+def _leading_int(value) -> int:
+    # "3/12" (ID3 style) -> 3
+    try:
+        return int(str(value).split("/")[0])
+    except (TypeError, ValueError):
+        return 0
+
+def layout_fields(
+    title: str,
+    artist: str,
+    album: str | None = None,
+    albumartist: str | None = None,
+    track=None,
+    disc=None,
+    year: str | None = None,
+) -> dict:
+    """
+    Values available to a library layout template.
+    """
+    return {
+        "title": title or "Unknown Title",
+        "artist": artist or "Unknown Artist",
+        "albumartist": albumartist or artist or "Unknown Artist",
+        "album": album or "Unknown Album",
+        "track": _leading_int(track),
+        "disc": _leading_int(disc) or 1,
+        "year": (year or "")[:4],
+    }
+
+def render_layout(template: str, fields: dict, suffix: str) -> Path:
+    """
+    Relative library path for a track, e.g.
+    "{albumartist}/{album}/{track:02} {title}" -> "A/B/01 C.mp3".
+
+    Every path segment goes through safe_filename; empty or
+    dot-only segments become "Unknown", so the result always
+    stays inside the library root.
+    """
+    # Separators inside values must not create directories
+    values = {
+        key: safe_filename(value) if isinstance(value, str) else value
+        for key, value in fields.items()
+    }
+    rendered = template.format(**values).replace("\\", "/")
+
+    parts = []
+    for part in rendered.split("/"):
+        part = safe_filename(part).strip(".")
+        parts.append(part or "Unknown")
+
+    parts[-1] += suffix
+    return Path(*parts)
+
+def validate_layout(template: str) -> None:
+    """
+    Raises ValueError if `template` cannot render a relative path.
+    """
+    if not template or not template.strip():
+        raise ValueError("Layout template must not be empty")
+
+    if template.startswith(("/", "\\")) or ".." in template.replace("\\", "/").split("/"):
+        raise ValueError("Layout template must be a relative path inside the library")
+
+    try:
+        render_layout(template, _SAMPLE_FIELDS, ".mp3")
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(
+            f"Invalid layout template ({e}); available fields: {', '.join(_SAMPLE_FIELDS)}"
+        )
+
+def _numbered(path: Path):
+    yield path
+    n = 2
+    while True:
+        yield path.with_name(f"{path.stem} ({n}){path.suffix}")
+        n += 1
+
+def unique_path(path: Path) -> Path:
+    """
+    `path`, or "name (2).ext", "name (3).ext", ... if it is taken.
+
+    Only a preview: the name may be taken before it is used. To place a
+    file, use move_to_unique_path.
+    """
+    for candidate in _numbered(path):
+        if not candidate.exists():
+            return candidate
+
+def move_to_unique_path(src, dst) -> Path:
+    """
+    atomic_move `src` to `dst`, or to the first free "name (n).ext".
+    Each candidate is claimed by the move itself, so concurrent movers
+    always end up with distinct files. Returns the path used.
+    """
+    dst = Path(dst)
+    for candidate in _numbered(dst):
+        if candidate.exists():
+            continue
+        try:
+            atomic_move(src, candidate, replace=False)
+        except FileExistsError:
+            continue
+        return candidate
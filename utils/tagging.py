@@ -1,5 +1,211 @@
+import io
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
 import requests
+
 from core.config import Config
+from infra.sqlite_cache import SQLiteCache, MISS
+
+logger = logging.getLogger(__name__)
+
+# JPEG quality steps tried when an image is over the byte budget
+RECOMPRESS_QUALITIES = (85, 75)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class AlbumArtCache:
+    """
+    On-disk, content-addressed album art cache.
+
+    - blobs are stored once per image hash (`<sha256>.jpg`), so identical
+      art reached through different URLs is kept once
+    - URL -> hash mappings live in a SQLiteCache
+    - total blob size is capped; least recently used blobs are evicted
+      (a hit bumps the blob's mtime)
+    - single-flight: concurrent requests for the same URL wait on one fetch
+    - images over `Config.ART_MAX_BYTES` are recompressed / downscaled
+      before they are cached, if Pillow is installed
+    """
+
+    def __init__(self, root: Path, max_total_bytes: int):
+        self.root = root
+        self.max_total_bytes = max_total_bytes
+
+        self._index = SQLiteCache(
+            Config.DB_PATH,
+            namespace="album_art",
+            ttl_seconds=Config.ART_CACHE_TTL_SECONDS,
+            max_entries=Config.ART_CACHE_MAX_ENTRIES,
+        )
+
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._fetches = 0
+        self._joined = 0
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / f"{digest}.jpg"
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        path = self._blob_path(digest)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+
+        # LRU recency
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.part")
+            partial.write_bytes(data)
+            os.replace(partial, path)
+            self._evict()
+
+        return digest
+
+    def _evict(self) -> None:
+        try:
+            blobs = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in os.scandir(self.root)
+                if entry.name.endswith(".jpg")
+            ]
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total <= self.max_total_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def get(self, url: str, fetch: Callable[[str], bytes]) -> bytes:
+        entry = self._index.get(url)
+        if entry is not MISS:
+            data = self._read_blob(entry)
+            if data is not None:
+                return data
+
+        with self._lock:
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[url] = flight
+                self._fetches += 1
+            else:
+                self._joined += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            data = _fit_to_budget(fetch(url), Config.ART_MAX_BYTES)
+            self._index.set(url, self._write_blob(data))
+            flight.result = data
+            return data
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(url, None)
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            fetches, joined = self._fetches, self._joined
+        return {
+            "fetches": fetches,
+            "single_flight_joins": joined,
+            "index": self._index.stats(),
+        }
+
+
+def _fit_to_budget(data: bytes, max_bytes: int) -> bytes:
+    """
+    Recompress, then downscale, an image until it fits `max_bytes`.
+    Returns the original bytes when it already fits, when no budget is
+    set, or when Pillow is not installed.
+    """
+    if not max_bytes or len(data) <= max_bytes:
+        return data
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+
+    try:
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+    except Exception as e:
+        logger.debug(f"Album art is not a decodable image, keeping as-is: {e}")
+        return data
+
+    best = data
+    while True:
+        for quality in RECOMPRESS_QUALITIES:
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=quality, optimize=True)
+            if len(out.getvalue()) < len(best):
+                best = out.getvalue()
+            if len(best) <= max_bytes:
+                return best
+
+        if min(image.size) <= Config.ART_MIN_DIMENSION:
+            return best
+        image = image.resize((image.width * 3 // 4, image.height * 3 // 4))
+
+
+_session = requests.Session()
+
+def _download(url: str) -> bytes:
+    resp = _session.get(url, timeout=Config.ALBUM_ART_TIMEOUT)
+    resp.raise_for_status()
+    return resp.content
+
+
+_cache: Optional[AlbumArtCache] = None
+_cache_lock = threading.Lock()
+
+def get_album_art_cache() -> AlbumArtCache:
+    """
+    Return the process-wide album art cache.
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = AlbumArtCache(Config.ART_CACHE_DIR, Config.ART_CACHE_MAX_BYTES)
+        return _cache
 
 
 def fetch_album_art(metadata: dict) -> bytes | None:
@@ -14,7 +220,4 @@ def fetch_album_art(metadata: dict) -> bytes | None:
     # iTunes trick: replace size with higher res
     hi_res = url.replace("100x100bb", "600x600bb")
 
-    resp = requests.get(hi_res, timeout=Config.ALBUM_ART_TIMEOUT)
-    resp.raise_for_status()
-
-    return resp.content
+    return get_album_art_cache().get(hi_res, _download)
@@ -0,0 +1,163 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import requests
+from ytmusicapi import YTMusic
+
+from core.config import Config
+from infra.sqlite_cache import SQLiteCache, MISS
+
+logger = logging.getLogger(__name__)
+
+class YTMusicClientPool:
+    """
+    Process-wide YTMusic clients, one per thread.
+
+    - each client keeps its own requests.Session, so searches reuse
+      keep-alive connections instead of opening a new one per job
+    - YTMusic objects are not shared across threads (their session and
+      header state are mutable)
+    - a client whose search raised is dropped and rebuilt on next use
+    - fork-safe: a child process never reuses its parent's client
+
+    `stats()` splits time spent building clients from time spent searching.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+        self._stats_lock = threading.Lock()
+        self._created = 0
+        self._create_seconds = 0.0
+        self._searches = 0
+        self._search_seconds = 0.0
+        self._failures = 0
+
+    def _client(self) -> YTMusic:
+        client = getattr(self._local, "client", None)
+        pid = getattr(self._local, "pid", None)
+
+        if client is not None and pid == os.getpid():
+            return client
+
+        start = time.perf_counter()
+        session = requests.Session()
+        client = YTMusic(requests_session=session)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._created += 1
+            self._create_seconds += elapsed
+
+        logger.debug(f"YTMusic client created in {elapsed * 1000:.0f} ms")
+
+        self._local.client = client
+        self._local.session = session
+        self._local.pid = os.getpid()
+        return client
+
+    def reset(self) -> None:
+        """Drop the calling thread's client; the next call builds a fresh one."""
+        session = getattr(self._local, "session", None)
+        if session is not None and self._local.pid == os.getpid():
+            session.close()
+        self._local.client = None
+        self._local.session = None
+        self._local.pid = None
+
+    def search(self, query: str, filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        client = self._client()
+
+        start = time.perf_counter()
+        try:
+            results = client.search(query, filter=filter)
+        except Exception:
+            with self._stats_lock:
+                self._failures += 1
+            self.reset()
+            raise
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._searches += 1
+            self._search_seconds += elapsed
+
+        logger.debug(f"YTMusic search took {elapsed * 1000:.0f} ms")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "clients_created": self._created,
+                "client_create_ms_total": round(self._create_seconds * 1000, 1),
+                "searches": self._searches,
+                "search_ms_avg": round(self._search_seconds * 1000 / self._searches, 1) if self._searches else None,
+                "failures": self._failures,
+            }
+
+
+_pool: Optional[YTMusicClientPool] = None
+_pool_lock = threading.Lock()
+
+def get_ytmusic_pool() -> YTMusicClientPool:
+    """
+    Return the process-wide YTMusic client pool.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = YTMusicClientPool()
+        return _pool
+
+
+def search_cache_key(query: str, filter: Optional[str]) -> str:
+    """
+    Cache key for a search: case and whitespace variations share an entry.
+    """
+    normalized = " ".join(query.casefold().split())
+    return f"{filter or ''}:{normalized}"
+
+
+_search_cache: Optional[SQLiteCache] = None
+
+def get_search_cache() -> SQLiteCache:
+    """
+    Return the process-wide YouTube Music search cache.
+    """
+    global _search_cache
+
+    with _pool_lock:
+        if _search_cache is None:
+            _search_cache = SQLiteCache(
+                Config.DB_PATH,
+                namespace="ytmusic_search",
+                ttl_seconds=Config.SEARCH_CACHE_TTL_SECONDS,
+                max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+            )
+        return _search_cache
+
+
+def cached_search(query: str, filter: Optional[str] = None, bypass: bool = False) -> List[Dict[str, Any]]:
+    """
+    YTMusic search through the persistent cache.
+
+    `bypass` skips the read but still refreshes the entry.
+    Empty results are not cached (they are often transient).
+    """
+    cache = get_search_cache()
+    key = search_cache_key(query, filter)
+
+    if not bypass:
+        cached = cache.get(key)
+        if cached is not MISS:
+            return cached
+
+    results = get_ytmusic_pool().search(query, filter=filter)
+    if results:
+        cache.set(key, results)
+
+    return results
@@ -0,0 +1,155 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.config import Config
+
+
+class DownloadLease:
+    """
+    One active download's slice of the bandwidth budget.
+
+    - `rate_limit` (bytes/s, None = unlimited) follows the fair share and
+      changes as downloads come and go; in-process yt-dlp picks it up
+      live through the bound params dict
+    - `fragments` is yt-dlp's concurrent fragment count, fixed at start
+    - `report()` feeds the progress hook's counters into the stats
+    """
+
+    def __init__(self, scheduler: "BandwidthScheduler", job_id: str, interactive: bool, fragments: int):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.interactive = interactive
+        self.fragments = fragments
+        self.rate_limit: Optional[int] = None
+
+        self.started_at = time.monotonic()
+        self.speed: Optional[float] = None
+        self.downloaded_bytes = 0
+        self.total_bytes: Optional[int] = None
+        self.eta: Optional[float] = None
+
+        self._params: Optional[Dict[str, Any]] = None
+
+    @property
+    def weight(self) -> int:
+        return Config.INTERACTIVE_BANDWIDTH_WEIGHT if self.interactive else 1
+
+    def bind(self, params: Dict[str, Any]) -> None:
+        """Keep `params["ratelimit"]` in step with this lease's share."""
+        self._params = params
+        self._apply()
+
+    def _apply(self) -> None:
+        if self._params is not None:
+            self._params["ratelimit"] = self.rate_limit
+
+    def report(
+        self,
+        downloaded_bytes: int,
+        speed: Optional[float],
+        total: Optional[int] = None,
+        eta: Optional[float] = None,
+    ) -> None:
+        self.downloaded_bytes = downloaded_bytes
+        self.speed = speed
+        self.total_bytes = total
+        self.eta = eta
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "job_id": self.job_id,
+            "interactive": self.interactive,
+            "rate_limit": self.rate_limit,
+            "fragments": self.fragments,
+            "speed": self.speed,
+            "downloaded_bytes": self.downloaded_bytes,
+            "total_bytes": self.total_bytes,
+            "eta": self.eta,
+            "average_speed": self.downloaded_bytes / elapsed if elapsed > 0 else None,
+            "elapsed_seconds": round(elapsed, 1),
+        }
+
+    def __enter__(self) -> "DownloadLease":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.scheduler.release(self)
+
+
+class BandwidthScheduler:
+    """
+    Shares the download budget between active downloads.
+
+    - the global budget (Config.DOWNLOAD_BANDWIDTH_BYTES, 0 = unlimited)
+      is split by weight: interactive jobs (`options.ask`) count
+      Config.INTERACTIVE_BANDWIDTH_WEIGHT times, bulk jobs once
+    - shares are recomputed whenever a download starts or ends
+    - interactive jobs get the full fragment concurrency; bulk jobs
+      split it, so a batch does not open dozens of connections
+    """
+
+    def __init__(self, budget: int, fragments: int):
+        self.budget = budget
+        self.fragments = max(1, fragments)
+
+        self._lock = threading.Lock()
+        self._leases: List[DownloadLease] = []
+
+    def acquire(self, job_id: str, interactive: bool) -> DownloadLease:
+        with self._lock:
+            bulk = sum(1 for lease in self._leases if not lease.interactive) + (not interactive)
+            fragments = self.fragments if interactive else max(1, self.fragments // bulk)
+
+            lease = DownloadLease(self, job_id, interactive, fragments)
+            self._leases.append(lease)
+            self._rebalance()
+            return lease
+
+    def release(self, lease: DownloadLease) -> None:
+        with self._lock:
+            if lease in self._leases:
+                self._leases.remove(lease)
+            self._rebalance()
+
+    def _rebalance(self) -> None:
+        total_weight = sum(lease.weight for lease in self._leases)
+
+        for lease in self._leases:
+            if self.budget and total_weight:
+                lease.rate_limit = max(1, self.budget * lease.weight // total_weight)
+            else:
+                lease.rate_limit = None
+            lease._apply()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            leases = [lease.stats() for lease in self._leases]
+
+        return {
+            "budget": self.budget or None,
+            "fragments": self.fragments,
+            "active": len(leases),
+            "speed": sum(lease["speed"] or 0 for lease in leases),
+            "downloads": leases,
+        }
+
+
+_scheduler: Optional[BandwidthScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_bandwidth_scheduler() -> BandwidthScheduler:
+    """
+    Return the process-wide bandwidth scheduler.
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            # The budget is shared by all supervised worker processes
+            budget = Config.DOWNLOAD_BANDWIDTH_BYTES
+            if budget:
+                budget = max(1, budget // Config.WORKER_PROCESS_COUNT)
+            _scheduler = BandwidthScheduler(budget, Config.DOWNLOAD_FRAGMENTS)
+        return _scheduler
@@ -1,43 +1,43 @@
 import os
+import time
 import logging
+import argparse
 import signal
+import subprocess
 import sys
 import threading
-from typing import NoReturn
+from typing import List, Optional
 
 # Add project root to path
 # This allows imports like 'infra.sqlite_job_store' to work
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
-from infra.sqlite_job_store import SqliteJobStore
+from infra.sqlite_job_store import SQLiteJobStore
 from worker.runtime import WorkerRuntime
 
-def main() -> None:
-    """
-    Entry point for the standalone worker process.
-    """
-    # Configure logging
-    log_level = os.getenv("TRUETRACK_LOG_LEVEL", "INFO").upper()
-    logging.basicConfig(
-        level=log_level,
-        format="[WORKER] %(asctime)s | %(levelname)s | %(message)s",
-    )
+# -------------------------------------------------
+# Supervisor Config
+# -------------------------------------------------
 
-    # Resolve DB path
-    # Must match the app.py / install script convention
-    db_path = os.getenv("TRUETRACK_DB_PATH")
-    if not db_path:
-        logging.error("TRUETRACK_DB_PATH env var is required")
-        sys.exit(1)
+DRAIN_TIMEOUT_SECONDS = 30      # grace period for children after SIGTERM
+# A worker drains a little less, so it exits on its own before being killed
+WORKER_DRAIN_SECONDS = DRAIN_TIMEOUT_SECONDS - 2
+RESTART_BACKOFF_SECONDS = [1, 2, 5, 10, 30]
+STABLE_UPTIME_SECONDS = 60      # a child alive this long resets its backoff
+SUPERVISOR_TICK_SECONDS = 0.5
 
+def run_worker(db_path: str) -> None:
+    """
+    Run one WorkerRuntime in this process until SIGINT/SIGTERM.
+    """
     logging.info(f"Starting Worker (DB: {db_path})...")
 
     # Initialize infrastructure
     try:
         # We don't need to run migrations here as the API/Installer handles that
         # But for robustness, we could, but let's assume schema exists.
-        store = SqliteJobStore(db_path)
+        store = SQLiteJobStore(db_path)
     except Exception as e:
         logging.critical(f"Failed to initialize JobStore: {e}")
         sys.exit(1)
@@ -58,10 +58,139 @@ def main() -> None:
 
     # Block main thread until signal
     shutdown_event.wait()
-    
+
+    # Stop claiming, let the steps in flight finish
     logging.info("Stopping worker runtime...")
-    runtime.stop()
+    runtime.stop(timeout=WORKER_DRAIN_SECONDS)
     logging.info("Worker exit.")
 
+class _Child:
+    def __init__(self, index: int):
+        self.index = index
+        self.proc: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.restart_at = 0.0
+
+def run_supervisor(processes: int) -> None:
+    """
+    Run `processes` worker processes against the shared SQLite store.
+
+    - each child is a full worker (`worker/main.py` without --processes)
+      with its own interpreter, so GIL-bound pipeline work scales
+    - pool sizes and the bandwidth budget are split between the
+      children (see Config.WORKER_PROCESS_COUNT)
+    - crashed children are restarted with backoff
+    - SIGINT/SIGTERM are forwarded as SIGTERM; children drain their
+      current step, and are killed after DRAIN_TIMEOUT_SECONDS
+    """
+    logging.info(f"Starting worker supervisor ({processes} processes)...")
+
+    shutdown_event = threading.Event()
+
+    def signal_handler(signum, frame):
+        logging.info(f"Received signal {signum}, draining workers...")
+        shutdown_event.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    children: List[_Child] = [_Child(i) for i in range(processes)]
+
+    # Children split the configured pool sizes and bandwidth budget
+    child_env = {**os.environ, "TRUETRACK_WORKER_PROCESS_COUNT": str(processes)}
+
+    def spawn(child: _Child) -> None:
+        child.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child-index", str(child.index)],
+            env=child_env,
+        )
+        child.started_at = time.monotonic()
+        logging.info(f"Started worker process #{child.index} (PID {child.proc.pid})")
+
+    for child in children:
+        spawn(child)
+
+    while not shutdown_event.is_set():
+        now = time.monotonic()
+
+        for child in children:
+            if child.proc is None:
+                if now >= child.restart_at:
+                    spawn(child)
+                continue
+
+            code = child.proc.poll()
+            if code is None:
+                continue
+
+            if now - child.started_at >= STABLE_UPTIME_SECONDS:
+                child.restarts = 0
+
+            delay = RESTART_BACKOFF_SECONDS[
+                min(child.restarts, len(RESTART_BACKOFF_SECONDS) - 1)
+            ]
+            child.restarts += 1
+            child.proc = None
+            child.restart_at = now + delay
+
+            logging.warning(
+                f"Worker process #{child.index} exited with code {code}, "
+                f"restarting in {delay}s"
+            )
+
+        shutdown_event.wait(SUPERVISOR_TICK_SECONDS)
+
+    # Forward shutdown and drain
+    running = [c.proc for c in children if c.proc and c.proc.poll() is None]
+    for proc in running:
+        proc.terminate()
+
+    deadline = time.monotonic() + DRAIN_TIMEOUT_SECONDS
+    for proc in running:
+        try:
+            proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            logging.warning(f"Worker process {proc.pid} did not drain in time, killing")
+            proc.kill()
+            proc.wait()
+
+    logging.info("Worker supervisor exit.")
+
+def main() -> None:
+    """
+    Entry point for the standalone worker process.
+    """
+    parser = argparse.ArgumentParser(description="TrueTrack worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.getenv("TRUETRACK_WORKER_PROCESSES", "1")),
+        help="Run N worker processes under a supervisor (default: 1, in-process)",
+    )
+    parser.add_argument("--child-index", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Configure logging
+    log_level = os.getenv("TRUETRACK_LOG_LEVEL", "INFO").upper()
+    prefix = "WORKER" if args.child_index is None else f"WORKER#{args.child_index}"
+    logging.basicConfig(
+        level=log_level,
+        format=f"[{prefix}] %(asctime)s | %(levelname)s | %(message)s",
+        force=True,
+    )
+
+    # Resolve DB path
+    # Must match the app.py / install script convention
+    db_path = os.getenv("TRUETRACK_DB_PATH")
+    if not db_path:
+        logging.error("TRUETRACK_DB_PATH env var is required")
+        sys.exit(1)
+
+    if args.child_index is None and args.processes > 1:
+        run_supervisor(args.processes)
+    else:
+        run_worker(db_path)
+
 if __name__ == "__main__":
     main()
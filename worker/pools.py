@@ -0,0 +1,100 @@
+import threading
+from typing import Dict, FrozenSet, List
+
+from core.config import Config
+from core.states import PipelineState
+
+# -------------------------------------------------
+# Stage → resource pool mapping
+# -------------------------------------------------
+
+# Each pipeline state is bound by one resource. Jobs in a state are only
+# claimed by workers of that state's pool, so a slow stage (ffmpeg, a long
+# download) can never occupy the slots of a quick one (metadata lookups).
+STAGE_POOL_STATES: Dict[str, FrozenSet[PipelineState]] = {
+    # Latency-bound API calls and trivial transitions
+    "network": frozenset({
+        PipelineState.INIT,
+        PipelineState.RESOLVING_IDENTITY,
+        PipelineState.SEARCHING,
+        PipelineState.MATCHING_METADATA,
+    }),
+    # Bandwidth-bound transfers (sized by the worker concurrency setting)
+    "download": frozenset({
+        PipelineState.DOWNLOADING,
+    }),
+    # ffmpeg transcoding
+    "cpu": frozenset({
+        PipelineState.EXTRACTING,
+    }),
+    # Tag writes and moves into the library
+    "disk": frozenset({
+        PipelineState.TAGGING,
+        PipelineState.STORING,
+        PipelineState.ARCHIVING,
+    }),
+}
+
+
+def per_process(limit: int) -> int:
+    """
+    This process's share of a configured total, when the supervisor runs
+    several worker processes (at least 1).
+    """
+    return max(1, limit // Config.WORKER_PROCESS_COUNT)
+
+
+def default_pool_limits(download_slots: int) -> Dict[str, int]:
+    return {
+        "network": per_process(Config.POOL_NETWORK_SLOTS),
+        "download": per_process(download_slots),
+        "cpu": per_process(Config.POOL_CPU_SLOTS),
+        "disk": per_process(Config.POOL_DISK_SLOTS),
+    }
+
+
+class StagePool:
+    """
+    A bounded set of workers dedicated to some pipeline states.
+
+    Tracks how many of its workers are busy; queue depth (runnable
+    jobs waiting for this pool) is read from the store on demand.
+    """
+
+    def __init__(self, name: str, states: FrozenSet[PipelineState], limit: int):
+        self.name = name
+        self.states = states
+        self.limit = limit
+
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    def enter(self) -> None:
+        with self._lock:
+            self._active += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def stats(self, store) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "states": sorted(state.name for state in self.states),
+            "limit": self.limit,
+            "active": self.active,
+            "queued": store.count_runnable(self.states),
+        }
+
+
+def build_stage_pools(download_slots: int) -> List[StagePool]:
+    limits = default_pool_limits(download_slots)
+    return [
+        StagePool(name, states, max(1, limits[name]))
+        for name, states in STAGE_POOL_STATES.items()
+    ]
@@ -1,27 +1,169 @@
 import os
 import time
 import shutil
+import socket
 import logging
 import threading
-from typing import Optional
-from datetime import datetime
+from typing import Optional, List, Tuple, Dict, Any
+from datetime import datetime, timezone
 
-from infra.job_store import JobStore
+from infra.job_store import JobStore, JobUnitOfWork, LeaseLostError, LOCK_TTL_SECONDS
 from core.pipeline_factory import create_pipeline
 from core.pipeline import PipelineError
 from core.states import PipelineState
 from core.job import Job
+from core.app_config import AppConfig
+from infra.library_index import get_library_index
+from core.config import Config
+from worker.pools import StagePool, STAGE_POOL_STATES, build_stage_pools, per_process
+from worker.bandwidth import get_bandwidth_scheduler
 
 # -------------------------------------------------
 # Constants & Config
 # -------------------------------------------------
 
-WORKER_ID = "worker-1"          # later: uuid / hostname
-POLL_INTERVAL_SECONDS = 0.5
+# Idle waits are event-driven (JobStore.wait_for_work). These only bound them:
+POLL_INTERVAL_SECONDS = 0.5     # when the store cannot notify across processes
+IDLE_MAX_WAIT_SECONDS = 30      # safety net against a missed notification
+
+# Lease renewal while a step runs (downloads/transcodes can outlive the TTL)
+HEARTBEAT_INTERVAL_SECONDS = LOCK_TTL_SECONDS / 3
 
 MAX_RETRIES = 3
 BACKOFF_SECONDS = [1, 5, 30]
 
+# Default wait in WorkerRuntime.stop() for in-flight steps to finish
+STOP_TIMEOUT_SECONDS = 5
+
+# How often each runtime publishes its pool/bandwidth stats to the store
+STATS_INTERVAL_SECONDS = 2
+
+def make_worker_id(index: int) -> str:
+    """
+    Unique, human-readable worker identity: hostname/pid/index.
+    Appears in job locks (locked_by) and logs.
+    """
+    return f"{socket.gethostname()}/{os.getpid()}/{index}"
+
+def make_process_id() -> str:
+    """Identity of this worker process in the published stats: hostname/pid."""
+    return f"{socket.gethostname()}/{os.getpid()}"
+
+def collect_worker_stats(store: JobStore) -> Dict[str, Any]:
+    """
+    Pools and downloads of every live worker process, from the snapshots
+    they publish to the store (see WorkerRuntime._publish_stats).
+
+    Pool limits and active counts are summed across processes; queue
+    depth is read once from the store. Downloads are listed per job.
+    """
+    snapshots = store.worker_stats()
+
+    pools: Dict[str, Dict[str, Any]] = {}
+    downloads: List[Dict[str, Any]] = []
+
+    for snapshot in snapshots:
+        for pool in snapshot["pools"]:
+            merged = pools.setdefault(pool["name"], {**pool, "limit": 0, "active": 0})
+            merged["limit"] += pool["limit"]
+            merged["active"] += pool["active"]
+
+        for download in snapshot["bandwidth"]["downloads"]:
+            downloads.append({**download, "process_id": snapshot["process_id"]})
+
+    for name, pool in pools.items():
+        pool["queued"] = store.count_runnable(STAGE_POOL_STATES[name])
+
+    return {
+        "processes": [
+            {"process_id": s["process_id"], "updated_at": s["updated_at"]}
+            for s in snapshots
+        ],
+        "pools": list(pools.values()),
+        "bandwidth": {
+            "budget": Config.DOWNLOAD_BANDWIDTH_BYTES or None,
+            "fragments": Config.DOWNLOAD_FRAGMENTS,
+            "active": len(downloads),
+            "speed": sum(d["speed"] or 0 for d in downloads),
+            "downloads": downloads,
+        },
+    }
+
+def is_orphaned_worker(worker_id: str) -> bool:
+    """
+    True if `worker_id` (see make_worker_id) belonged to a process on
+    this host that no longer exists. Unknown formats and other hosts
+    are never considered orphaned: their leases expire by TTL.
+
+    Only meaningful before this process spawns its own workers:
+    a lease carrying our own PID is then from a previous process.
+    """
+    try:
+        host, pid_str, _ = worker_id.split("/")
+        pid = int(pid_str)
+    except ValueError:
+        return False
+
+    if host != socket.gethostname():
+        return False
+
+    if pid == os.getpid():
+        return True
+
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+
+    return False
+
+class LeaseHeartbeat:
+    """
+    Renews a claimed job's lease in the background while steps run.
+
+    `lost` is set when renewal is rejected (lease taken over); the
+    worker's next fenced write then fails with LeaseLostError.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, lease_token: int):
+        self.store = store
+        self.job_id = job_id
+        self.lease_token = lease_token
+        self.lost = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"truetrack-heartbeat-{self.job_id[:8]}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL_SECONDS):
+            try:
+                if not self.store.renew_lease(self.job_id, self.lease_token):
+                    self.lost = True
+                    logging.warning(f"Lost lease on job {self.job_id}")
+                    return
+            except Exception as e:
+                # Transient DB trouble: keep trying until the TTL decides
+                logging.error(f"Lease heartbeat for job {self.job_id} failed: {e}")
+
 logging.basicConfig(
     level=logging.INFO,
     format="[WORKER] %(asctime)s | %(levelname)s | %(message)s",
@@ -37,57 +179,93 @@ class Worker:
 
     Responsibilities:
     - pick runnable jobs
-    - execute exactly ONE pipeline step
+    - execute ONE pipeline step per claim (or run until pause, if enabled)
     - persist job state
     - respect USER_* pauses
     """
 
-    def __init__(self, store: JobStore, stop_event: threading.Event):
+    def __init__(
+        self,
+        store: JobStore,
+        stop_event: threading.Event,
+        worker_id: Optional[str] = None,
+        run_until_pause: bool = Config.WORKER_RUN_UNTIL_PAUSE,
+        pool: Optional[StagePool] = None,
+    ):
         self.store = store
         self.stop_event = stop_event
+        self.worker_id = worker_id or make_worker_id(0)
+        self.run_until_pause = run_until_pause
+        self.pool = pool  # None: claim jobs in any state
 
     def run_forever(self) -> None:
-        logging.info("Worker started")
+        logging.info(f"Worker {self.worker_id} started")
 
         while not self.stop_event.is_set():
+            # Read BEFORE claiming so a notify in between is not lost
+            generation = self.store.work_generation()
             job = self._fetch_next_job()
 
             if not job:
-                time.sleep(POLL_INTERVAL_SECONDS)
+                self.store.wait_for_work(generation, self._idle_timeout())
                 continue
 
             self._process_job(job)
 
-        logging.info("Worker stopped gracefully")
+        logging.info(f"Worker {self.worker_id} stopped gracefully")
 
-    def _fetch_next_job(self) -> Optional[Job]:
-        job_id = self.store.next_runnable()
-        if not job_id:
-            return None
+    def _idle_timeout(self) -> float:
+        """
+        How long to sleep when nothing is runnable:
+        exactly until the earliest delayed retry / lock expiry,
+        bounded by the polling fallback or the safety net.
+        """
+        if self.store.notifier.cross_process:
+            timeout = float(IDLE_MAX_WAIT_SECONDS)
+        else:
+            timeout = POLL_INTERVAL_SECONDS
 
-        job = self.store.get(job_id)
-        if not job:
-            return None
+        wake_at = self.store.next_wakeup_at(LOCK_TTL_SECONDS)
+        if wake_at:
+            delay = (wake_at - datetime.now(timezone.utc)).total_seconds()
+            timeout = min(timeout, max(delay, 0.0))
 
-        now = datetime.utcnow()
+        return timeout
 
-        job.acquire_lock(WORKER_ID, now)
-        self.store.update(job)
+    def _fetch_next_job(self) -> Optional[Job]:
+        job = self.store.claim_next(
+            self.worker_id,
+            LOCK_TTL_SECONDS,
+            states=self.pool.states if self.pool else None,
+        )
+        if not job:
+            return None
 
         logging.info(
             f"Picked job {job.job_id} "
-            f"(state={job.current_state.name}, locked_by={WORKER_ID})"
+            f"(state={job.current_state.name}, locked_by={self.worker_id})"
         )
         return job
 
     def _process_job(self, job: Job) -> None:
         """
-        Execute exactly ONE pipeline step for a locked job.
+        Execute pipeline steps for a locked job.
+
+        Modes:
+        - single-step (default): exactly ONE pipeline.step() per claim,
+          so jobs interleave fairly
+        - run-until-pause: keep stepping while the job advances into
+          non-pausing states of this worker's pool, checkpointing after
+          each step and renewing the lease instead of releasing it
 
         Invariants:
         - job is already locked by this worker
-        - exactly one pipeline.step() call
+        - cancellation barrier after EVERY step
         - lock is ALWAYS released before return
+        - lease renewed by a heartbeat; writes fenced by its token
+        - each step is persisted exactly once: a checkpoint between
+          steps, or the final write together with the lock release
+          (see JobUnitOfWork)
         """
 
         # Reload job to catch external cancellation
@@ -95,13 +273,52 @@ class Worker:
         if not fresh:
             return
 
-        job = fresh
+        # Fence every write with the lease we claimed, not whatever
+        # lease the reload happened to observe
+        if fresh.lease_token != job.lease_token:
+            fresh.lease_token = job.lease_token
 
-        if job.current_state == PipelineState.CANCELLED:
-            logging.info(f"Job {job.job_id} was cancelled before execution step")
-            job.release_lock()
-            self.store.update(job)
-            return
+        if self.pool:
+            self.pool.enter()
+
+        try:
+            with LeaseHeartbeat(self.store, job.job_id, job.lease_token):
+                self._run_claimed(fresh)
+        except LeaseLostError:
+            logging.warning(
+                f"Job {job.job_id}: lease lost while processing, "
+                f"discarding this worker's result"
+            )
+        finally:
+            if self.pool:
+                self.pool.leave()
+
+    def _run_claimed(self, job: Job) -> None:
+        with JobUnitOfWork(self.store, job) as uow:
+            if uow.job.current_state == PipelineState.CANCELLED:
+                logging.info(f"Job {uow.job.job_id} was cancelled before execution step")
+                return
+
+            while self._step(uow):
+                if not self.run_until_pause or self.stop_event.is_set():
+                    break
+
+                # The next stage belongs to another pool: hand the job over
+                if self.pool and uow.job.current_state not in self.pool.states:
+                    break
+
+                # Keep the lease: refresh it and persist the step
+                uow.job.acquire_lock(self.worker_id, datetime.now(timezone.utc))
+                uow.checkpoint()
+
+    def _step(self, uow: JobUnitOfWork) -> bool:
+        """
+        Run one pipeline.step() on `uow.job`.
+
+        Returns True only if the job advanced into a state that the
+        same worker may continue with (not paused, not terminal).
+        """
+        job = uow.job
 
         prev_state = job.current_state
         pipeline = create_pipeline()
@@ -110,38 +327,44 @@ class Worker:
             pipeline.step(job)
 
         except PipelineError as e:
+            if e.category == "TRANSIENT" and job.retry_count < MAX_RETRIES:
+                delay = BACKOFF_SECONDS[
+                    min(job.retry_count, len(BACKOFF_SECONDS) - 1)
+                ]
+                job.schedule_retry(delay)
+
+                logging.warning(
+                    f"Job {job.job_id} transient failure ({e.message}), retry scheduled "
+                    f"in {delay}s (attempt {job.retry_count}/{MAX_RETRIES})"
+                )
+                return False
+
             job.fail(e.code, e.message, category=e.category, tool=e.tool)
-            job.release_lock()
-            self.store.update(job)
 
             logging.error(
                 f"Job {job.job_id} failed: {e.code} | {e.message}"
             )
-            return
+            return False
 
         except Exception as e:
             if job.retry_count >= MAX_RETRIES:
                 job.fail("MAX_RETRIES_EXCEEDED", str(e))
-                job.release_lock()
-                self.store.update(job)
 
                 logging.error(
                     f"Job {job.job_id} failed after max retries"
                 )
-                return
+                return False
 
             delay = BACKOFF_SECONDS[
                 min(job.retry_count, len(BACKOFF_SECONDS) - 1)
             ]
             job.schedule_retry(delay)
-            job.release_lock()
-            self.store.update(job)
 
             logging.warning(
                 f"Job {job.job_id} retry scheduled "
                 f"in {delay}s (attempt {job.retry_count}/{MAX_RETRIES})"
             )
-            return
+            return False
 
         # Cancellation barrier BEFORE persisting new state
         fresh = self.store.get(job.job_id)
@@ -149,61 +372,50 @@ class Worker:
             logging.info(
                 f"Job {job.job_id} cancelled during {prev_state.name}"
             )
-            job.release_lock()
-            self.store.update(fresh)
-            return
-
-        # Persist successful step
-        self.store.update(job)
+            uow.replace(fresh)
+            return False
 
         # -------------------------------------------------
-        # Stop conditions (NO LOOPS)
+        # Stop conditions (end of this claim)
         # -------------------------------------------------
 
         if job.current_state == prev_state:
-            job.release_lock()
-            self.store.update(job)
-
             logging.warning(
                 f"Job {job.job_id} did not advance state "
                 f"({job.current_state.name})"
             )
-            return
+            return False
 
         if job.current_state.name.startswith("USER_"):
-            job.release_lock()
-            self.store.update(job)
-
             logging.info(
                 f"Job {job.job_id} waiting for user input "
                 f"({job.current_state.name})"
             )
-            return
+            return False
 
         if job.current_state in (
             PipelineState.FINALIZED,
             PipelineState.FAILED,
         ):
+            # Persist the terminal state before deleting its artifacts
+            uow.flush()
             self._cleanup_temp_dir(job)
-            job.release_lock()
-            self.store.update(job)
 
             logging.info(
                 f"Job {job.job_id} finished "
                 f"(state={job.current_state.name})"
             )
-            return
+            return False
 
         # -------------------------------------------------
-        # Continue later (lock released, job re-eligible)
+        # Advanced: continue later (lock released, job re-eligible)
+        # or right away in run-until-pause mode
         # -------------------------------------------------
 
-        job.release_lock()
-        self.store.update(job)
-
         logging.info(
             f"Job {job.job_id} advanced to {job.current_state.name}"
         )
+        return True
 
     def _cleanup_temp_dir(self, job: Job) -> None:
         """
@@ -235,36 +447,198 @@ class Worker:
 
 class WorkerRuntime:
     """
-    Owns the lifecycle of the Worker.
+    Owns the lifecycle of the stage pools and their Workers.
     This is NOT job logic.
+
+    Every pipeline state belongs to one resource pool (see worker/pools.py):
+    network, download, cpu, disk. Each pool runs `limit` workers that only
+    claim jobs in its states, so stages with different bottlenecks never
+    starve each other. Atomic claiming (JobStore.claim_next) guarantees
+    each job is stepped by at most one worker at a time.
+
+    `concurrency` (the worker concurrency setting) sizes the download pool.
     """
 
-    def __init__(self, store: JobStore):
+    def __init__(
+        self,
+        store: JobStore,
+        concurrency: Optional[int] = None,
+        run_until_pause: bool = Config.WORKER_RUN_UNTIL_PAUSE,
+    ):
         self.store = store
-        self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
+        self.concurrency = concurrency or AppConfig.get_worker_concurrency()
+        self.run_until_pause = run_until_pause
+
+        self.pools: Dict[str, StagePool] = {
+            pool.name: pool for pool in build_stage_pools(self.concurrency)
+        }
+
+        self._lock = threading.Lock()
+        self._started = False
+        self._next_index = 0
+        self._process_id = make_process_id()
+        self._stats_stop = threading.Event()
+        self._stats_thread: Optional[threading.Thread] = None
+        self._workers: Dict[str, List[Tuple[Worker, threading.Thread]]] = {
+            name: [] for name in self.pools
+        }
 
     def start(self) -> None:
-        if self._thread:
-            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+            # Receive wakeups from other processes sharing the store
+            self.store.notifier.listen()
+
+            # Reclaim leases of crashed processes now instead of after the TTL
+            released = self.store.release_orphaned_leases(is_orphaned_worker)
+            if released:
+                logging.info(f"Released {released} orphaned job lease(s)")
+
+            for pool in self.pools.values():
+                self._scale(pool)
+
+            # Let the API see this process's pools and downloads
+            self._stats_stop = threading.Event()
+            self._stats_thread = threading.Thread(
+                target=self._publish_stats,
+                args=(self._stats_stop,),
+                name="truetrack-worker-stats",
+                daemon=True,
+            )
+            self._stats_thread.start()
 
-        worker = Worker(self.store, self._stop_event)
+            # Bring the library index up to date off the job path
+            threading.Thread(
+                target=self._scan_library,
+                name="truetrack-library-scan",
+                daemon=True,
+            ).start()
 
-        self._thread = threading.Thread(
+        logging.info(
+            "WorkerRuntime started ("
+            + ", ".join(f"{p.name}={p.limit}" for p in self.pools.values())
+            + ")"
+        )
+
+    def _scan_library(self) -> None:
+        try:
+            get_library_index().ensure_scanned(AppConfig.get_music_library_root())
+        except Exception as e:
+            logging.warning(f"Library scan failed: {e}")
+
+    def _publish_stats(self, stop: threading.Event) -> None:
+        while True:
+            try:
+                self.store.publish_worker_stats(self._process_id, {
+                    "process_id": self._process_id,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                    "pools": self.pool_stats(),
+                    "bandwidth": get_bandwidth_scheduler().stats(),
+                })
+            except Exception as e:
+                logging.warning(f"Publishing worker stats failed: {e}")
+
+            if stop.wait(STATS_INTERVAL_SECONDS):
+                return
+
+    def resize(self, concurrency: int) -> None:
+        """
+        Apply a new worker concurrency setting (the download pool size).
+        """
+        self.concurrency = concurrency
+        self.resize_pool("download", concurrency)
+
+    def resize_pool(self, name: str, limit: int) -> None:
+        """
+        Grow or shrink one pool at runtime.
+        Removed workers finish their current step before exiting.
+        """
+        with self._lock:
+            pool = self.pools[name]
+            pool.limit = per_process(limit)
+
+            if self._started:
+                self._scale(pool)
+
+        self.store.notifier.notify()  # wake idle workers so removed ones exit
+        logging.info(f"WorkerRuntime pool {name} resized to {pool.limit} workers")
+
+    def pool_stats(self) -> List[Dict[str, object]]:
+        return [pool.stats(self.store) for pool in self.pools.values()]
+
+    def _scale(self, pool: StagePool) -> None:
+        workers = self._workers[pool.name]
+
+        while len(workers) < pool.limit:
+            workers.append(self._spawn_worker(pool))
+
+        while len(workers) > pool.limit:
+            worker, _ = workers.pop()
+            worker.stop_event.set()
+
+    def _spawn_worker(self, pool: StagePool) -> Tuple[Worker, threading.Thread]:
+        index = self._next_index
+        self._next_index += 1
+
+        worker = Worker(
+            self.store,
+            threading.Event(),
+            worker_id=make_worker_id(index),
+            run_until_pause=self.run_until_pause,
+            pool=pool,
+        )
+
+        thread = threading.Thread(
             target=worker.run_forever,
-            name="truetrack-worker",
+            name=f"truetrack-worker-{pool.name}-{index}",
             daemon=True,
         )
-        self._thread.start()
+        thread.start()
 
-        logging.info("WorkerRuntime started")
+        return worker, thread
 
-    def stop(self) -> None:
-        if not self._thread:
-            return
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS) -> None:
+        """
+        Stop claiming jobs and wait up to `timeout` seconds for the steps
+        in flight (a download, a transcode) to finish and persist.
+        Steps still running after that die with the process.
+        """
+        with self._lock:
+            if not self._started:
+                return
+
+            workers = [w for pool_workers in self._workers.values() for w in pool_workers]
+            self._workers = {name: [] for name in self.pools}
+            self._started = False
 
         logging.info("Stopping WorkerRuntime")
-        self._stop_event.set()
-        self._thread.join(timeout=5)
+        self._stats_stop.set()
+        for worker, _ in workers:
+            worker.stop_event.set()
+        self.store.notifier.notify()  # wake idle workers so they see the stop
+
+        deadline = time.monotonic() + timeout
+        for _, thread in workers:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+        unfinished = [thread.name for _, thread in workers if thread.is_alive()]
+        if unfinished:
+            logging.warning(
+                f"WorkerRuntime stop timed out after {timeout}s; "
+                f"abandoning in-flight steps: {', '.join(unfinished)}"
+            )
+
+        self.store.notifier.close()
+
+        # After the last snapshot, so a late publish cannot bring it back
+        if self._stats_thread:
+            self._stats_thread.join(timeout=STATS_INTERVAL_SECONDS)
+        try:
+            self.store.clear_worker_stats(self._process_id)
+        except Exception as e:
+            logging.warning(f"Clearing worker stats failed: {e}")
 
         logging.info("WorkerRuntime stopped")